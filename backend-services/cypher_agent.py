@@ -1,35 +1,56 @@
 import os
+import json
 from dotenv import load_dotenv
 
 from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from llm_cache import llm_cache
+from models import GraphSpec
+
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not set in environment variables.")
 
-SYSTEM_PROMPT = f"""
-You are a graph data engineer specializing in Neo4j.
+SPEC_SYSTEM_PROMPT = """
+You are a graph data engineer specializing in supply chain knowledge graphs.
 
 You will be given a structured business description.
-Your task is to generate executable Cypher queries that:
+Your task is to describe the supply chain as a graph:
 - Create nodes for all entities (Company, Factory, Supplier, Material, LogisticsProvider, Warehouse, Product, Market, etc.)
 - Create relationships that accurately represent the business structure
-- Use MERGE instead of CREATE where appropriate
 - Use clear labels and relationship types
 - Include relevant properties (name, location, role, material type, etc.)
-- Assume the database is empty
-- Produce Cypher that can be executed directly in Neo4j Browser or via a driver
+
+Output Format (JSON):
+{
+  "nodes": [
+    {"label": "Supplier", "key": "supplier_regional_wood", "props": {"name": "Regional Wood Supplier", "location": "India"}}
+  ],
+  "edges": [
+    {"type": "SUPPLIES", "from": "supplier_regional_wood", "to": "material_rubberwood", "props": {}}
+  ]
+}
 
 Rules:
-- Output ONLY Cypher queries
+- Output ONLY valid JSON
 - Do NOT explain anything
 - Do NOT wrap output in markdown
-- Do NOT include comments
-- Do NOT ask questions
-- To EVERY SINGLE node and edge that you give in the graph, attach a label with "id_" + the project ID that will be passed in by the user. Do not append Project_ or anything, just use the "id_" + raw id as a label.
+- Every node has exactly one label, written in PascalCase with no spaces
+- Every relationship type is written in UPPER_SNAKE_CASE with no spaces
+- Relationships that move goods point downstream, in the direction the goods travel, and use these types:
+  - SUPPLIES: Supplier -> Material, or Supplier -> Factory/Company for finished components
+  - USED_IN: Material -> Factory/Company or Material -> Product
+  - PRODUCES: Factory/Company -> Product
+  - SHIPS_TO: Factory/Company/LogisticsProvider/Warehouse -> Warehouse/Market/Customer
+  - SOLD_IN: Product -> Market
+- Never point a goods relationship upstream (no Factory -[:USES_MATERIAL]-> Material)
+- Relationships that do not move goods (ownership, operation, services) use other types such as OPERATES or OWNS
+- Every node key is a unique snake_case identifier, and every edge refers to nodes by key
+- Every node has a "name" property
+- Property values are strings, numbers, booleans or lists of those; never nested objects
 """
 
 BUSINESS_DESCRIPTION = """
@@ -76,17 +97,28 @@ cypher_llm = ChatGroq(
   api_key=GROQ_API_KEY
 )
 
-def get_cypher_queries(proj_id: str, description: str) -> str:
-    response = cypher_llm.invoke([
-        SystemMessage(SYSTEM_PROMPT),
-        HumanMessage(description + f"\nProject Id: {proj_id}")
-    ])
-
-    # print(" === CYPHER QUERIES RETURNED BY THE LLM === ")
-    # print(response.content)
-
-    return response.content
+def get_graph_spec(proj_id: str, description: str, bypass_cache: bool = False) -> GraphSpec:
+    """Asks the model for a JSON graph spec and validates it. Raises
+    ValueError (or pydantic's ValidationError) when the output is unusable."""
+    def parse(response: str) -> GraphSpec:
+        start_idx = response.find('{')
+        end_idx = response.rfind('}')
+        if start_idx == -1 or end_idx == -1:
+            raise ValueError(f"No JSON object in graph spec response for project {proj_id}")
+        return GraphSpec.model_validate(json.loads(response[start_idx:end_idx + 1]))
+
+    messages = [HumanMessage(description)]
+    # Only a spec that validates is cached, so a retry asks the model again.
+    return llm_cache.call(
+        cypher_llm.model_name,
+        cypher_llm.reasoning_effort,
+        SPEC_SYSTEM_PROMPT,
+        messages,
+        lambda: cypher_llm.invoke([SystemMessage(SPEC_SYSTEM_PROMPT)] + messages).content,
+        bypass=bypass_cache,
+        parse=parse
+    )
 
 if __name__ == "__main__":
-    response = get_cypher_queries("aaaaaaaaaaa", BUSINESS_DESCRIPTION)
-    print(response)
\ No newline at end of file
+    spec = get_graph_spec("aaaaaaaaaaa", BUSINESS_DESCRIPTION)
+    print(spec.model_dump_json(by_alias=True, indent=2))
\ No newline at end of file
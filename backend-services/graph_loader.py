@@ -0,0 +1,73 @@
+import os
+import re
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+from neo4j_ops import driver, ENTITY_LABEL
+from models import GraphSpec
+
+load_dotenv()
+
+GRAPH_BATCH_SIZE = int(os.getenv("GRAPH_BATCH_SIZE", "500"))
+
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _ident(name: str) -> str:
+    # Labels and relationship types cannot be parameters, so they are
+    # interpolated and must be plain identifiers.
+    if not IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid label or relationship type: {name!r}")
+    return f"`{name}`"
+
+def _batches(rows: list, batch_size: int):
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
+
+def _write(session, query: str, rows: list, batch_size: int, **params):
+    for batch in _batches(rows, batch_size):
+        session.execute_write(lambda tx: tx.run(query, rows=batch, **params).consume())
+
+def load_graph(project_id: str, spec: GraphSpec, batch_size: int = GRAPH_BATCH_SIZE):
+    """Writes the spec with one UNWIND MERGE per label and relationship type,
+    batch_size rows per write transaction. Nodes are merged on
+    (projectId, label, name), so re-running a load is idempotent."""
+    nodes_by_label = defaultdict(list)
+    node_refs = {}
+    for node in spec.nodes:
+        nodes_by_label[node.label].append({"name": node.props["name"], "props": node.props})
+        node_refs[node.key] = (node.label, node.props["name"])
+
+    edges_by_type = defaultdict(list)
+    for edge in spec.edges:
+        from_label, from_name = node_refs[edge.source]
+        to_label, to_name = node_refs[edge.target]
+        edges_by_type[edge.type].append({
+            "fromLabel": from_label,
+            "from": from_name,
+            "toLabel": to_label,
+            "to": to_name,
+            "props": edge.props
+        })
+
+    with driver.session() as session:
+        for label, rows in nodes_by_label.items():
+            query = f"""
+                UNWIND $rows AS row
+                MERGE (n:{ENTITY_LABEL} {{projectId: $projectId, label: $label, name: row.name}})
+                SET n += row.props
+                SET n:{_ident(label)}
+            """
+            _write(session, query, rows, batch_size, projectId=project_id, label=label)
+
+        for rel_type, rows in edges_by_type.items():
+            query = f"""
+                UNWIND $rows AS row
+                MATCH (a:{ENTITY_LABEL} {{projectId: $projectId, label: row.fromLabel, name: row.from}})
+                MATCH (b:{ENTITY_LABEL} {{projectId: $projectId, label: row.toLabel, name: row.to}})
+                MERGE (a)-[r:{_ident(rel_type)}]->(b)
+                SET r += row.props, r.projectId = $projectId
+            """
+            _write(session, query, rows, batch_size, projectId=project_id)
+
+    print(f"Loaded {len(spec.nodes)} nodes and {len(spec.edges)} relationships")
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+
+from neo4j_ops import get_topology
+from mongo import store_lineage
+from redis_ops import get_graph_version
+
+# Sources whose reachability is propagated together, one bit each.
+LINEAGE_BLOCK = int(os.getenv("LINEAGE_BLOCK", "1024"))
+
+def reachability(n: int, src: np.ndarray, dst: np.ndarray, block: int = LINEAGE_BLOCK):
+    """Yields (sources, reached) per block of source nodes, where reached is
+    an (n, len(sources)) bool matrix and reached[v, j] means v is reachable
+    from sources[j] by a path of at least one relationship. Reachability is
+    bit-packed and propagated along every edge at once until it settles."""
+    order = np.argsort(dst, kind="stable")
+    src, dst = src[order], dst[order]
+    fed, starts = np.unique(dst, return_index=True)
+
+    for first in range(0, n, block):
+        sources = np.arange(first, min(first + block, n))
+        seed = np.zeros((n, len(sources)), dtype=bool)
+        seed[sources, np.arange(len(sources))] = True
+        seed = np.packbits(seed, axis=1)
+
+        reached = np.zeros_like(seed)
+        # A node is reached through a predecessor that is a source or reached.
+        for _ in range(n):
+            if not len(src):
+                break
+            frontier = seed | reached
+            updated = reached.copy()
+            updated[fed] = np.bitwise_or.reduceat(frontier[src], starts, axis=0)
+            if np.array_equal(updated, reached):
+                break
+            reached = updated
+        yield sources, np.unpackbits(reached, axis=1, count=len(sources)).astype(bool)
+
+def compute_lineage(project_id: str) -> int:
+    """Stores every node's transitive upstream and downstream elementIds,
+    tagged with the graph version they were computed from. Returns the number
+    of (upstream, downstream) pairs."""
+    version = get_graph_version(project_id)
+    graph = get_topology(project_id)
+    ids = graph["ids"]
+    n = len(ids)
+    index = {element_id: i for i, element_id in enumerate(ids)}
+    src = np.array([index[s] for s, _ in graph["edges"]], dtype=np.int64)
+    dst = np.array([index[t] for _, t in graph["edges"]], dtype=np.int64)
+
+    upstream = [[] for _ in range(n)]
+    downstream = [[] for _ in range(n)]
+    pairs = 0
+    for sources, reached in reachability(n, src, dst):
+        targets, columns = np.nonzero(reached)
+        for target, column in zip(targets.tolist(), columns.tolist()):
+            source = int(sources[column])
+            if source == target:
+                continue
+            upstream[target].append(ids[source])
+            downstream[source].append(ids[target])
+            pairs += 1
+
+    store_lineage(project_id, version, [
+        {"elementId": ids[i], "upstream": upstream[i], "downstream": downstream[i]}
+        for i in range(n)
+    ])
+    return pairs
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import hashlib
+
+from dotenv import load_dotenv
+
+from redis_ops import redisClient
+
+load_dotenv()
+
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+CACHE_KEY = "llm_cache:{}"
+LRU_KEY = "llm_cache:lru"
+STATS_KEY = "llm_cache:stats"
+
+def _normalize_message(message):
+    if isinstance(message, dict):
+        return [message.get("role", ""), message.get("content", "")]
+    if isinstance(message, (list, tuple)):
+        return [message[0], message[1]]
+    # langchain BaseMessage
+    return [message.type, message.content]
+
+class LLMCache:
+    """Redis-backed response cache keyed on a hash of everything that
+    determines the model output. Least recently used entries are evicted
+    once the cache holds more than max_entries."""
+    def __init__(
+        self,
+        client=redisClient,
+        ttl: int = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        bypass: bool = LLM_CACHE_BYPASS
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bypass = bypass
+
+    def key(self, model: str, reasoning_effort, system_prompt: str, messages: list) -> str:
+        payload = json.dumps(
+            [model, reasoning_effort, system_prompt, [_normalize_message(m) for m in messages]],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        value = self.client.get(CACHE_KEY.format(key))
+        if value is None:
+            self.client.hincrby(STATS_KEY, "misses", 1)
+            return None
+        self.client.hincrby(STATS_KEY, "hits", 1)
+        self.client.zadd(LRU_KEY, {key: time.time()})
+        return value
+
+    def set(self, key: str, value: str):
+        pipe = self.client.pipeline()
+        pipe.set(CACHE_KEY.format(key), value, ex=self.ttl)
+        pipe.zadd(LRU_KEY, {key: time.time()})
+        pipe.zcard(LRU_KEY)
+        size = pipe.execute()[-1]
+        if size > self.max_entries:
+            evicted = self.client.zpopmin(LRU_KEY, size - self.max_entries)
+            if evicted:
+                self.client.delete(*[CACHE_KEY.format(k) for k, _ in evicted])
+                self.client.hincrby(STATS_KEY, "evictions", len(evicted))
+
+    def call(self, model: str, reasoning_effort, system_prompt: str, messages: list, fn, bypass: bool = False, parse=None):
+        """Returns the cached response for these inputs, or calls fn() and
+        caches the string it returns. Empty responses are not cached.
+
+        If parse is given, the return value is parse(response) instead, and a
+        response is only cached once parse has accepted it; parse raises on
+        malformed output. A cached response parse rejects is dropped and
+        fetched again, so a bad reply is never replayed to a retry."""
+        parse = parse or (lambda response: response)
+        if self.bypass or bypass:
+            return parse(fn())
+        key = self.key(model, reasoning_effort, system_prompt, messages)
+        cached = self.get(key)
+        if cached is not None:
+            try:
+                return parse(cached)
+            except Exception as e:
+                print(f"Dropping cached LLM response {key}: {e}")
+                self.delete(key)
+        response = fn()
+        result = parse(response)
+        if response:
+            self.set(key, response)
+        return result
+
+    def delete(self, key: str):
+        pipe = self.client.pipeline()
+        pipe.delete(CACHE_KEY.format(key))
+        pipe.zrem(LRU_KEY, key)
+        pipe.execute()
+
+    def stats(self) -> dict:
+        stats = {k: int(v) for k, v in self.client.hgetall(STATS_KEY).items()}
+        stats["entries"] = self.client.zcard(LRU_KEY)
+        return stats
+
+llm_cache = LLMCache()
+
+if __name__ == "__main__":
+    print(llm_cache.stats())
@@ -1,49 +1,193 @@
-import json
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
 import time
 
-from redis_ops import wait_and_pop, set_status, redisClient
-from mongo import get_description, store_cypher_queries, store_research_results
-from cypher_agent import get_cypher_queries
-from neo4j_ops import run_graphdb_query, get_all_nodes
-from research_list_agent import get_research_list
-from research_agent import ResearcherAgent
+from redis_ops import reserve_task, extend_lease, ack_task, fail_task, requeue_stale, start_status, set_status, touch_status, bump_graph_version, get_graph_version, send_heartbeat, clear_heartbeat, redisClient, HEARTBEAT_TTL
+from mongo import ensure_indexes, get_description, store_graph_spec, get_graph_spec_for, get_checkpoint, mark_stage_complete, get_layout_version, get_lineage_version
+from cypher_agent import get_graph_spec
+from neo4j_ops import get_all_nodes, ensure_schema
+from graph_loader import load_graph
+from layout import compute_layout
+from lineage import compute_lineage
+from models import GraphSpec
+from research_executor import ResearchExecutor
 
-researcher_agent = ResearcherAgent()
 # redisClient.lpush("task_queue", "8bhqfqn9yh")
 
-while True:
-    proj_id = wait_and_pop()
+# How long a worker blocks on the queue before re-checking for shutdown.
+POP_TIMEOUT = 5
+
+def load_or_generate_spec(proj_id: str, proj_description: str, completed: dict) -> GraphSpec:
+    if 'spec' in completed:
+        return GraphSpec.model_validate(get_graph_spec_for(proj_id))
+
+    spec = get_graph_spec(proj_id, proj_description)
+    print(f"Graph spec: {len(spec.nodes)} nodes, {len(spec.edges)} relationships")
+
+    print("Storing graph spec...")
+    store_graph_spec(proj_id, spec.model_dump(by_alias=True))
+    mark_stage_complete(proj_id, 'spec')
+    print("Done.")
+    return spec
+
+def research_progress(proj_id: str, already_researched: int, total: int):
+    """on_progress callback for ResearchExecutor.run that publishes the count
+    of researched nodes and an ETA extrapolated from this run's rate."""
+    started = time.monotonic()
+    def report(stored: int, pending: int):
+        elapsed = time.monotonic() - started
+        set_status(
+            proj_id, 'Researching',
+            researched=already_researched + stored, total=total,
+            eta=round(elapsed / stored * (pending - stored))
+        )
+    return report
+
+def process_project(proj_id: str, research_executor: ResearchExecutor):
     print(f"Project ID: {proj_id}")
+    checkpoint = get_checkpoint(proj_id)
+    completed = checkpoint['stages']
+    if completed:
+        print(f"Resuming project {proj_id}, completed stages: {list(completed)}")
+
     set_status(proj_id, 'Queued')
     proj_description = get_description(proj_id)
-    cypher_queries = get_cypher_queries(proj_id, proj_description)
-    print(cypher_queries)
 
-    print("Storing Cypher queries...")
-    store_cypher_queries(proj_id=proj_id, queries=cypher_queries)
-    print("Done.")
+    if 'graph' not in completed:
+        spec = load_or_generate_spec(proj_id, proj_description, completed)
 
-    set_status(proj_id, 'Creating graph')
-    print("Running Cypher queries...")
-    run_graphdb_query(cypher_queries)
-    print("Done.")
+        set_status(proj_id, 'Creating graph')
+        print("Loading graph...")
+        load_graph(proj_id, spec)
+        bump_graph_version(proj_id)
+        mark_stage_complete(proj_id, 'graph')
+        print("Done.")
+
+    # Layout and lineage follow the graph version rather than a one-shot
+    # checkpoint, so a graph that changed since they ran gets them recomputed.
+    if get_layout_version(proj_id) != get_graph_version(proj_id):
+        set_status(proj_id, 'Computing layout')
+        moved = compute_layout(proj_id)
+        print(f"Laid out {moved} nodes")
+
+    if get_lineage_version(proj_id) != get_graph_version(proj_id):
+        set_status(proj_id, 'Indexing lineage')
+        pairs = compute_lineage(proj_id)
+        print(f"Indexed {pairs} upstream/downstream pairs")
+
+    if 'research' not in completed:
+        set_status(proj_id, 'Preparing for research')
+        research_list = get_all_nodes(proj_id)
+
+        skip_ids = set(checkpoint['researchedIds'])
+        already_researched = sum(1 for obj in research_list if obj.element_id in skip_ids)
+        set_status(proj_id, 'Researching', researched=already_researched, total=len(research_list))
+        print("Now researching individual components...")
+        remaining = research_executor.run(
+            proj_id, proj_description, research_list,
+            skip_ids=skip_ids,
+            on_progress=research_progress(proj_id, already_researched, len(research_list))
+        )
+        if remaining:
+            raise RuntimeError(f"{remaining} nodes could not be researched")
+        mark_stage_complete(proj_id, 'research')
+
+    set_status(proj_id, 'Completed')
+
+class Worker:
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stop_event = threading.Event()
+        self.current_project = None
+        self.research_executor = ResearchExecutor()
+
+    def stop(self, *args):
+        print(f"Worker {self.worker_id} stopping after the current project...")
+        self.stop_event.set()
+
+    def heartbeat(self):
+        while not self.stop_event.is_set():
+            send_heartbeat(self.worker_id, self.current_project)
+            project_id = self.current_project
+            if project_id is not None:
+                extend_lease(project_id)
+                touch_status(project_id)
+            self.stop_event.wait(HEARTBEAT_TTL / 3)
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        heartbeat_thread = threading.Thread(target=self.heartbeat, daemon=True)
+        heartbeat_thread.start()
+        print(f"Worker {self.worker_id} started")
+
+        while not self.stop_event.is_set():
+            requeue_stale()
+            proj_id = reserve_task(timeout=POP_TIMEOUT)
+            if proj_id is None:
+                continue
+            self.current_project = proj_id
+            send_heartbeat(self.worker_id, proj_id)
+            start_status(proj_id, self.worker_id)
+            try:
+                process_project(proj_id, self.research_executor)
+                ack_task(proj_id)
+            except Exception as E:
+                print(f" === Worker {self.worker_id} failed on project {proj_id} === ")
+                print(E)
+                if fail_task(proj_id, str(E)):
+                    set_status(proj_id, 'Retrying', error=str(E))
+                else:
+                    set_status(proj_id, 'Failed', error=str(E))
+            self.current_project = None
+
+        heartbeat_thread.join()
+        clear_heartbeat(self.worker_id)
+        print(f"Worker {self.worker_id} stopped")
+
+def run_worker():
+    ensure_schema()
+    ensure_indexes()
+    Worker().run()
+
+def run_supervisor(pool_size: int):
+    """Keeps pool_size worker processes alive until SIGINT/SIGTERM."""
+    # spawn gives every worker its own Mongo, Redis and Neo4j clients.
+    ctx = multiprocessing.get_context("spawn")
+    stop_event = threading.Event()
+
+    def stop(*args):
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    processes = []
+    while not stop_event.is_set():
+        processes = [p for p in processes if p.is_alive()]
+        for _ in range(pool_size - len(processes)):
+            p = ctx.Process(target=run_worker)
+            p.start()
+            processes.append(p)
+        stop_event.wait(POP_TIMEOUT)
+
+    print("Supervisor shutting down, waiting for workers to finish...")
+    for p in processes:
+        if p.is_alive():
+            os.kill(p.pid, signal.SIGTERM)
+    for p in processes:
+        p.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Supply chain pipeline worker")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes to run")
+    args = parser.parse_args()
 
-    set_status(proj_id, 'Preparing for research')
-    # print("Getting research list...")
-    # research_list = get_research_list(proj_id, proj_description, cypher_queries)
-    # print(f" === Research List === \n{research_list}\n\n")
-
-    research_list = get_all_nodes(proj_id)
-    
-    set_status(proj_id, 'Researching')
-    print("Now researching individual components...")
-    for i, obj in enumerate(research_list):
-        print(" === Now researching: === ")
-        print(obj)
-        print(" ==== ")
-        research_response = researcher_agent.call(proj_description, str(obj))
-        store_research_results(i, proj_id, obj.element_id, str(research_response))
-        print("Waiting fro 60 seconds\n...")
-        time.sleep(60)
-
-    break
\ No newline at end of file
+    if args.workers > 1:
+        run_supervisor(args.workers)
+    else:
+        run_worker()
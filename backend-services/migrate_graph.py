@@ -0,0 +1,70 @@
+import argparse
+
+from neo4j_ops import driver, ensure_schema, ENTITY_LABEL
+from redis_ops import bump_graph_version
+
+# Moves projects from the old per-project `id_<projectId>` labels to the shared
+# Entity label with a projectId property. Each batch removes the old label
+# from the nodes it rewrites, so re-running after an interruption resumes.
+
+NODE_BATCH = f"""
+    MATCH (n:`{{old_label}}`)
+    WITH n LIMIT $batchSize
+    SET n:{ENTITY_LABEL},
+        n.projectId = $projectId,
+        n.label = head([l IN labels(n) WHERE l <> '{{old_label}}' AND l <> '{ENTITY_LABEL}']),
+        n.name = coalesce(n.name, elementId(n))
+    REMOVE n:`{{old_label}}`
+    RETURN count(n) AS migrated
+"""
+
+RELATIONSHIP_BATCH = f"""
+    MATCH (:{ENTITY_LABEL} {{projectId: $projectId}})-[r]->(:{ENTITY_LABEL} {{projectId: $projectId}})
+    WHERE r.projectId IS NULL
+    WITH r LIMIT $batchSize
+    SET r.projectId = $projectId
+    RETURN count(r) AS migrated
+"""
+
+def legacy_project_ids(session) -> list:
+    labels = session.run("CALL db.labels() YIELD label RETURN label").value()
+    return [label[3:] for label in labels if label.startswith("id_")]
+
+def _run_batches(session, query: str, **params) -> int:
+    total = 0
+    while True:
+        migrated = session.execute_write(lambda tx: tx.run(query, **params).single()["migrated"])
+        if migrated == 0:
+            return total
+        total += migrated
+
+def migrate_project(session, project_id: str, batch_size: int):
+    if not project_id.isalnum():
+        raise ValueError(f"Invalid project id: {project_id!r}")
+    old_label = f"id_{project_id}"
+    nodes = _run_batches(
+        session, NODE_BATCH.replace("{old_label}", old_label),
+        projectId=project_id, batchSize=batch_size
+    )
+    relationships = _run_batches(
+        session, RELATIONSHIP_BATCH,
+        projectId=project_id, batchSize=batch_size
+    )
+    bump_graph_version(project_id)
+    print(f"Project {project_id}: migrated {nodes} nodes and {relationships} relationships")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate per-project Neo4j labels to the projectId property")
+    parser.add_argument("--project", help="only migrate this project id")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with driver.session() as session:
+        project_ids = [args.project] if args.project else legacy_project_ids(session)
+        for project_id in project_ids:
+            migrate_project(session, project_id, args.batch_size)
+
+    # Created after migrating so duplicate names surface as a constraint
+    # error here instead of aborting a migration batch.
+    if not ensure_schema():
+        raise SystemExit("Schema incomplete: remove duplicate (label, name) nodes within each project and re-run")
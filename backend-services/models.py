@@ -1,5 +1,7 @@
-from pydantic import BaseModel
+import re
+from pydantic import BaseModel, Field, field_validator, model_validator
 from enum import IntEnum
+from typing import Dict, List, Union
 
 class FinalDescription(BaseModel):
     projectId: str
@@ -15,4 +17,88 @@ class AIModel(IntEnum):
     DESCRIPTION_AGENT = 0
     CYPHER_AGENT = 1
     RESEARCH_AGENT = 2
-    CHAT_AGENT = 3
\ No newline at end of file
+    CHAT_AGENT = 3
+
+class KeyMetric(BaseModel):
+    metric: str
+    value: Union[str, int, float]
+    context: str = ""
+
+class Risk(BaseModel):
+    risk: str
+    severity: str = ""
+    mitigation: str = ""
+
+class Recommendation(BaseModel):
+    action: str
+    priority: str = ""
+    timeframe: str = ""
+    rationale: str = ""
+
+class ResearchResult(BaseModel):
+    findings: str
+    keyMetrics: List[KeyMetric] = []
+    risks: List[Risk] = []
+    recommendations: List[Recommendation] = []
+    confidence: str = ""
+    lastUpdated: str = ""
+
+class BatchResearchResult(ResearchResult):
+    elementId: str
+
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+PropertyValue = Union[str, int, float, bool, List[str], List[int], List[float]]
+
+class GraphNode(BaseModel):
+    label: str
+    key: str
+    props: Dict[str, PropertyValue] = {}
+
+    @field_validator("label")
+    @classmethod
+    def label_is_identifier(cls, label: str) -> str:
+        if not IDENTIFIER_RE.match(label):
+            raise ValueError(f"Invalid label: {label!r}")
+        return label
+
+    @model_validator(mode="after")
+    def has_name(self):
+        # Nodes are merged on (projectId, label, name) when the graph is loaded.
+        self.props.pop("projectId", None)
+        self.props.pop("label", None)
+        self.props.setdefault("name", self.key)
+        return self
+
+class GraphEdge(BaseModel):
+    type: str
+    source: str = Field(alias="from")
+    target: str = Field(alias="to")
+    props: Dict[str, PropertyValue] = {}
+
+    model_config = {"populate_by_name": True}
+
+    @field_validator("type")
+    @classmethod
+    def type_is_identifier(cls, rel_type: str) -> str:
+        if not IDENTIFIER_RE.match(rel_type):
+            raise ValueError(f"Invalid relationship type: {rel_type!r}")
+        return rel_type
+
+class GraphSpec(BaseModel):
+    nodes: List[GraphNode]
+    edges: List[GraphEdge] = []
+
+    @model_validator(mode="after")
+    def edges_reference_nodes(self):
+        keys = [node.key for node in self.nodes]
+        duplicates = {key for key in keys if keys.count(key) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate node keys: {sorted(duplicates)}")
+        known = set(keys)
+        for edge in self.edges:
+            edge.props.pop("projectId", None)
+            for key in (edge.source, edge.target):
+                if key not in known:
+                    raise ValueError(f"Edge {edge.type} references unknown node {key!r}")
+        return self
\ No newline at end of file
@@ -1,5 +1,7 @@
 import os
-from pymongo import MongoClient
+from datetime import datetime, timezone
+from pymongo import MongoClient, IndexModel, ReplaceOne, ASCENDING
+from pymongo.errors import OperationFailure
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -12,21 +14,53 @@ mongo_client = MongoClient(MONGO_URI)
 
 db = mongo_client.get_database('supply')
 desc_collection = db['Descriptions']
-cypher_collection = db['Cypher_Queries']
 research_collection = db['ResearchResults']
+checkpoint_collection = db['Checkpoints']
+graph_spec_collection = db['GraphSpecs']
+layout_collection = db['Layouts']
+lineage_collection = db['Lineage']
+
+LINEAGE_WRITE_BATCH = 1000
+
+# One index per query shape below. backend/api/mongo.py declares the same
+# indexes for the collections it shares with the worker.
+INDEXES = [
+    (desc_collection, [
+        IndexModel([("projectId", ASCENDING)], name="description_project"),
+    ]),
+    (research_collection, [
+        IndexModel([("projectId", ASCENDING), ("elementId", ASCENDING)], name="research_project_element"),
+    ]),
+    (checkpoint_collection, [
+        IndexModel([("projectId", ASCENDING)], name="checkpoint_project", unique=True),
+    ]),
+    (graph_spec_collection, [
+        IndexModel([("projectId", ASCENDING)], name="graph_spec_project", unique=True),
+    ]),
+    (layout_collection, [
+        IndexModel([("projectId", ASCENDING)], name="layout_project", unique=True),
+    ]),
+    (lineage_collection, [
+        IndexModel([("projectId", ASCENDING), ("elementId", ASCENDING), ("version", ASCENDING)], name="lineage_node", unique=True),
+    ]),
+]
+
+# (name, collection, filter, projection) of every hot read, with
+# placeholder values; see check_query_plans.
+HOT_QUERIES = [
+    ("get_description", desc_collection, {"projectId": ""}, {"description": 1}),
+    ("get_graph_spec_for", graph_spec_collection, {"projectId": ""}, {"spec": 1}),
+    ("get_layout_for", layout_collection, {"projectId": ""}, {"positions": 1}),
+    ("get_checkpoint", checkpoint_collection, {"projectId": ""}, None),
+    ("store_lineage", lineage_collection, {"projectId": "", "version": {"$ne": ""}}, {"_id": 1}),
+]
 
 def get_description(projId: str):
     description = desc_collection.find_one({
         "projectId": projId
-    })
+    }, {"description": 1})
     return description['description']
 
-def store_cypher_queries(proj_id: str, queries: str):
-    cypher_collection.insert_one({
-        "projectId": proj_id,
-        "queries": [q for q in queries.split('\n') if len(q)>0]
-    })
-
 def store_research_results(i: int, proj_id: str, element_id: str, research_result: str):
     research_collection.insert_one({
         "index": i,
@@ -35,5 +69,112 @@ def store_research_results(i: int, proj_id: str, element_id: str, research_resul
         "researchResult": research_result
     })
 
+def store_graph_spec(proj_id: str, spec: dict):
+    graph_spec_collection.update_one(
+        {"projectId": proj_id},
+        {"$set": {"spec": spec}},
+        upsert=True
+    )
+
+def get_graph_spec_for(proj_id: str):
+    stored = graph_spec_collection.find_one({"projectId": proj_id}, {"spec": 1})
+    if stored is None:
+        return None
+    return stored['spec']
+
+def store_layout(proj_id: str, positions: dict, version: str = None):
+    """positions maps node elementId to [x, y]. version is the graph version
+    the layout is current for."""
+    layout_collection.update_one(
+        {"projectId": proj_id},
+        {"$set": {"positions": positions, "version": version, "updatedAt": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+def set_layout_version(proj_id: str, version: str):
+    layout_collection.update_one({"projectId": proj_id}, {"$set": {"version": version}})
+
+def get_layout_version(proj_id: str):
+    stored = layout_collection.find_one({"projectId": proj_id}, {"version": 1})
+    return stored.get('version') if stored else None
+
+def get_layout_for(proj_id: str) -> dict:
+    stored = layout_collection.find_one({"projectId": proj_id}, {"positions": 1})
+    if stored is None:
+        return {}
+    return stored['positions']
+
+def store_lineage(proj_id: str, version: str, entries: list):
+    """Writes one document per node, then drops documents of other graph
+    versions, so readers never see a partially replaced index. Documents are
+    upserted on (projectId, elementId, version), so re-running the stage for
+    the same version overwrites them instead of hitting lineage_node."""
+    for start in range(0, len(entries), LINEAGE_WRITE_BATCH):
+        lineage_collection.bulk_write([
+            ReplaceOne(
+                {"projectId": proj_id, "elementId": entry["elementId"], "version": version},
+                {"projectId": proj_id, "version": version, **entry},
+                upsert=True
+            )
+            for entry in entries[start:start + LINEAGE_WRITE_BATCH]
+        ], ordered=False)
+    lineage_collection.delete_many({"projectId": proj_id, "version": {"$ne": version}})
+
+def get_lineage_version(proj_id: str):
+    stored = lineage_collection.find_one({"projectId": proj_id}, {"version": 1})
+    return stored['version'] if stored else None
+
+def get_checkpoint(proj_id: str) -> dict:
+    checkpoint = checkpoint_collection.find_one({"projectId": proj_id})
+    if checkpoint is None:
+        return {"projectId": proj_id, "stages": {}, "researchedIds": []}
+    return checkpoint
+
+def mark_stage_complete(proj_id: str, stage: str):
+    checkpoint_collection.update_one(
+        {"projectId": proj_id},
+        {"$set": {f"stages.{stage}": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+def mark_node_researched(proj_id: str, element_id: str):
+    checkpoint_collection.update_one(
+        {"projectId": proj_id},
+        {"$addToSet": {"researchedIds": element_id}},
+        upsert=True
+    )
+
+def ensure_indexes():
+    """Creates any missing index in INDEXES. Safe to run on every start."""
+    for collection, indexes in INDEXES:
+        try:
+            collection.create_indexes(indexes)
+        except OperationFailure as E:
+            print(f" === Could not create indexes on {collection.name} === ")
+            print(E)
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+def check_query_plans() -> list:
+    """Explains every HOT_QUERIES entry and raises if any winning plan is a
+    collection scan. Returns the names of the queries checked."""
+    scans = []
+    for name, collection, query, projection in HOT_QUERIES:
+        plan = collection.find(query, projection).explain()["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in _plan_stages(plan):
+            scans.append(name)
+    if scans:
+        raise RuntimeError(f"Collection scans in hot queries: {', '.join(scans)}")
+    return [name for name, *_ in HOT_QUERIES]
+
 if __name__=="__main__":
-    print(get_description('aaaaaaaaaaa'))
\ No newline at end of file
+    ensure_indexes()
+    print(f"No collection scans in {len(check_query_plans())} hot queries")
\ No newline at end of file
@@ -1,4 +1,5 @@
 from neo4j import GraphDatabase
+from neo4j.exceptions import Neo4jError
 import os
 
 from dotenv import load_dotenv
@@ -21,6 +22,31 @@ for var in required_env_vars:
 
 driver = GraphDatabase.driver(NEO4J_URI, auth=NEO4J_AUTH)
 
+# Every supply chain node carries this shared label plus projectId, label and
+# name properties, so all projects share one set of indexes.
+ENTITY_LABEL = "Entity"
+
+SCHEMA_QUERIES = [
+    "CREATE INDEX entity_project IF NOT EXISTS FOR (n:Entity) ON (n.projectId)",
+    "CREATE CONSTRAINT entity_key IF NOT EXISTS FOR (n:Entity) REQUIRE (n.projectId, n.label, n.name) IS UNIQUE",
+]
+
+def ensure_schema() -> bool:
+    """Creates any missing index or constraint in SCHEMA_QUERIES. A failure,
+    such as entity_key over a project with duplicate (label, name) pairs, is
+    logged rather than raised so workers still start. Returns False if any
+    query failed."""
+    created = True
+    with driver.session() as session:
+        for query in SCHEMA_QUERIES:
+            try:
+                session.run(query).consume()
+            except Neo4jError as E:
+                print(f" === Could not apply schema query: {query} === ")
+                print(E)
+                created = False
+    return created
+
 def run_graphdb_query(query, parameters=None):
     with driver.session() as session:
         result = session.run(query, parameters)
@@ -28,7 +54,29 @@ def run_graphdb_query(query, parameters=None):
 
 def get_all_nodes(project_id: str):
     with driver.session() as session:
-        result = session.run(f"MATCH (n:id_{project_id}) RETURN n")
+        result = session.run(
+            "MATCH (n:Entity {projectId: $projectId}) RETURN n",
+            projectId=project_id
+        )
         return [record["n"] for record in result]
     
+def get_topology(project_id: str) -> dict:
+    """Node elementIds and labels, and the relationships as (source, target)
+    elementId pairs."""
+    with driver.session() as session:
+        nodes = session.run(
+            "MATCH (n:Entity {projectId: $projectId}) RETURN elementId(n) AS id, n.label AS label",
+            projectId=project_id
+        ).data()
+        edges = session.run(
+            "MATCH (a:Entity {projectId: $projectId})-[]->(b:Entity {projectId: $projectId}) "
+            "RETURN elementId(a) AS source, elementId(b) AS target",
+            projectId=project_id
+        ).data()
+    return {
+        "ids": [node["id"] for node in nodes],
+        "labels": [node["label"] for node in nodes],
+        "edges": [(edge["source"], edge["target"]) for edge in edges]
+    }
+
 # print(get_all_nodes("8bhqfqn9yh"))
@@ -1,3 +1,7 @@
+import os
+import json
+import time
+
 import redis
 
 redisClient = redis.Redis(
@@ -9,13 +13,169 @@ redisClient = redis.Redis(
 # print(redisClient.ping())
 
 TASK_QUEUE = "task_queue"
+PROCESSING_QUEUE = "task_queue:processing"
+LEASES = "task_queue:leases"
+DELAYED_QUEUE = "task_queue:delayed"
+ATTEMPTS = "task_queue:attempts"
+DEAD_LETTER_QUEUE = "task_queue:dead"
+
+GRAPH_VERSION_KEY = "graph_version:{}"
+
+# Per-project status record: a hash with the current stage, the time each
+# stage of the current run started ("started:<stage>"), progress counters,
+# the worker running it and its last heartbeat. Projects being worked on are
+# scored by run start in STATUS_ACTIVE; finished records expire.
+STATUS_KEY = "project_status:{}"
+STATUS_ACTIVE = "project_status:active"
+STATUS_TTL = int(os.getenv("STATUS_TTL", str(7 * 24 * 3600)))
+# Stages that end a run. A retry starts a new one.
+FINAL_STAGES = ("Completed", "Failed", "Retrying")
+
+# Per-project stream of progress events, read by the API's progress endpoint.
+PROGRESS_KEY = "progress:{}"
+PROGRESS_MAXLEN = 100
+PROGRESS_TTL = 7 * 24 * 3600
+
+HEARTBEAT_KEY = "worker_heartbeat:{}"
+HEARTBEAT_TTL = 30
+
+# A reserved task whose lease is not extended within this many seconds is
+# assumed to belong to a dead worker and is put back on the queue.
+VISIBILITY_TIMEOUT = 300
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 30
+
+def reserve_task(timeout: int = 0):
+    """Moves the next project id into the processing list and leases it.
+    The task stays there until ack_task or fail_task is called."""
+    proj_id = redisClient.blmove(TASK_QUEUE, PROCESSING_QUEUE, timeout, src="RIGHT", dest="LEFT")
+    if proj_id is None:
+        return None
+    redisClient.zadd(LEASES, {proj_id: time.time() + VISIBILITY_TIMEOUT})
+    return proj_id
+
+def extend_lease(project_id: str):
+    # xx: never resurrect a lease that was already acked or reclaimed.
+    redisClient.zadd(LEASES, {project_id: time.time() + VISIBILITY_TIMEOUT}, xx=True)
+
+def _release(project_id: str):
+    pipe = redisClient.pipeline()
+    pipe.lrem(PROCESSING_QUEUE, 1, project_id)
+    pipe.zrem(LEASES, project_id)
+    pipe.execute()
+
+def ack_task(project_id: str):
+    _release(project_id)
+    redisClient.hdel(ATTEMPTS, project_id)
+
+def fail_task(project_id: str, error: str = ""):
+    """Schedules a retry with exponential backoff, or dead-letters the task
+    once it has failed MAX_ATTEMPTS times."""
+    _release(project_id)
+    attempts = redisClient.hincrby(ATTEMPTS, project_id, 1)
+    if attempts >= MAX_ATTEMPTS:
+        redisClient.hdel(ATTEMPTS, project_id)
+        redisClient.lpush(DEAD_LETTER_QUEUE, json.dumps({
+            "projectId": project_id,
+            "attempts": attempts,
+            "error": error,
+            "timestamp": time.time()
+        }))
+        return False
+    delay = RETRY_BACKOFF * 2 ** (attempts - 1)
+    redisClient.zadd(DELAYED_QUEUE, {project_id: time.time() + delay})
+    return True
+
+def requeue_stale():
+    """Reclaims tasks whose lease expired and re-queues retries that are due.
+    Safe to call from every worker: ZREM decides which caller owns an entry."""
+    now = time.time()
+
+    # A worker that died between BLMOVE and ZADD leaves a task with no lease.
+    for project_id in redisClient.lrange(PROCESSING_QUEUE, 0, -1):
+        redisClient.zadd(LEASES, {project_id: now + VISIBILITY_TIMEOUT}, nx=True)
+
+    for project_id in redisClient.zrangebyscore(LEASES, "-inf", now):
+        if redisClient.zrem(LEASES, project_id):
+            print(f"Reclaiming stale task {project_id}")
+            retrying = fail_task(project_id, "lease expired")
+            set_status(project_id, 'Retrying' if retrying else 'Failed', error="lease expired")
+
+    for project_id in redisClient.zrangebyscore(DELAYED_QUEUE, "-inf", now):
+        if redisClient.zrem(DELAYED_QUEUE, project_id):
+            redisClient.lpush(TASK_QUEUE, project_id)
+
+def queue_stats():
+    pipe = redisClient.pipeline()
+    pipe.llen(TASK_QUEUE)
+    pipe.llen(PROCESSING_QUEUE)
+    pipe.zcard(DELAYED_QUEUE)
+    pipe.llen(DEAD_LETTER_QUEUE)
+    queued, in_flight, delayed, dead = pipe.execute()
+    return {
+        "queued": queued,
+        "inFlight": in_flight,
+        "delayed": delayed,
+        "deadLetter": dead
+    }
+
+def start_status(project_id: str, worker_id: str):
+    """Replaces the project's status record with a new run on worker_id."""
+    now = time.time()
+    pipe = redisClient.pipeline()
+    pipe.delete(STATUS_KEY.format(project_id))
+    pipe.hset(STATUS_KEY.format(project_id), mapping={"workerId": worker_id, "startedAt": now, "heartbeat": now})
+    pipe.zadd(STATUS_ACTIVE, {project_id: now})
+    pipe.execute()
+
+def set_status(project_id: str, status: str, **progress):
+    """Moves the project's status record to stage status, with any of
+    researched, total, eta (seconds) and error, and appends the same to the
+    project's progress stream. A final stage ends the run: the project leaves
+    the active set and its record expires after STATUS_TTL."""
+    now = time.time()
+    progress = {key: value for key, value in progress.items() if value is not None}
+    key = STATUS_KEY.format(project_id)
+    pipe = redisClient.pipeline()
+    pipe.hset(key, mapping={"stage": status, **progress})
+    pipe.hsetnx(key, f"started:{status}", now)
+    if status in FINAL_STAGES:
+        pipe.hset(key, "finishedAt", now)
+        pipe.zrem(STATUS_ACTIVE, project_id)
+        pipe.expire(key, STATUS_TTL)
+    else:
+        pipe.persist(key)
+    pipe.xadd(PROGRESS_KEY.format(project_id), {"event": json.dumps({"stage": status, "timestamp": now, **progress})}, maxlen=PROGRESS_MAXLEN, approximate=True)
+    pipe.expire(PROGRESS_KEY.format(project_id), PROGRESS_TTL)
+    pipe.execute()
+
+def touch_status(project_id: str):
+    redisClient.hset(STATUS_KEY.format(project_id), "heartbeat", time.time())
+
+def bump_graph_version(project_id: str) -> int:
+    """Invalidates every cached view of the project's graph."""
+    return redisClient.incr(GRAPH_VERSION_KEY.format(project_id))
+
+def get_graph_version(project_id: str) -> str:
+    return redisClient.get(GRAPH_VERSION_KEY.format(project_id)) or "0"
+
+def send_heartbeat(worker_id: str, project_id: str = None):
+    redisClient.set(
+        HEARTBEAT_KEY.format(worker_id),
+        json.dumps({"projectId": project_id, "timestamp": time.time()}),
+        ex=HEARTBEAT_TTL
+    )
 
-def wait_and_pop():
-    entry = redisClient.brpop(TASK_QUEUE)
-    return entry[1]
+def clear_heartbeat(worker_id: str):
+    redisClient.delete(HEARTBEAT_KEY.format(worker_id))
 
-def set_status(project_id: str, status: str):
-    redisClient.hset(name='status', key=project_id, value=status)
+def get_live_workers():
+    workers = {}
+    for key in redisClient.scan_iter(HEARTBEAT_KEY.format("*")):
+        value = redisClient.get(key)
+        if value is not None:
+            workers[key.split(":", 1)[1]] = json.loads(value)
+    return workers
 
 if __name__ == "__main__":
-    print(wait_and_pop())
\ No newline at end of file
+    print(queue_stats())
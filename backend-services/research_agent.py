@@ -6,9 +6,21 @@ from langchain_groq import ChatGroq
 from langchain.agents import create_agent
 
 from tavily import TavilyClient
+from pydantic import ValidationError
+
+from models import BatchResearchResult
+
+from llm_cache import llm_cache
 
 load_dotenv()
 
+class ResearchParseError(ValueError):
+	"""Raised by the llm_cache parse callbacks for output that must not be
+	cached. result is what the caller returns in its place."""
+	def __init__(self, result):
+		super().__init__(result.get("error", "Unusable research response"))
+		self.result = result
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not set in environment variables.")
@@ -69,6 +81,42 @@ Rules:
 - If information is not available, state this explicitly in findings
 """
 
+DELTA_PROMPT = """
+You are a supply chain research specialist. You will be given existing research on a supply chain entity, the Neo4j node it was found on, and context about a new business that also depends on it.
+The existing research is still valid. Your task is only to state what is different for this business.
+
+Output Format (JSON):
+{
+  "relevance": "How this entity matters to this specific business",
+  "additionalRisks": [
+    {
+      "risk": "Risk specific to this business",
+      "severity": "High/Medium/Low",
+      "mitigation": "Suggested mitigation strategy"
+    }
+  ],
+  "additionalRecommendations": [
+    {
+      "action": "Action specific to this business",
+      "priority": "High/Medium/Low",
+      "rationale": "Why this action is recommended"
+    }
+  ]
+}
+
+Rules:
+- Output ONLY valid JSON
+- Do NOT repeat findings already present in the existing research
+- Keep it brief
+"""
+
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+Batch Mode:
+You will be given several nodes at once as a JSON array of {"elementId": ..., "node": ...} objects.
+Research each node independently and output a JSON array with exactly one object per node.
+Each object must follow the Output Format above and additionally carry the "elementId" of the node it describes, copied verbatim.
+"""
+
 tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
 
 class ResearcherAgent:
@@ -80,6 +128,11 @@ class ResearcherAgent:
 			reasoning_effort='medium',
 			api_key=GROQ_API_KEY
 		)
+		self.delta_llm = ChatGroq(
+			model="openai/gpt-oss-120b",
+			reasoning_effort='low',
+			api_key=GROQ_API_KEY
+		)
 		self.research_agent = create_agent(
 			model=self.llm,
 			system_prompt=SYSTEM_PROMPT,
@@ -104,13 +157,8 @@ class ResearcherAgent:
 		self.search_calls += 1
 		return search_result
     
-	def call(self, proj_description, query):
-		self.search_calls = 0
-		research_content = self.research_agent.invoke({
-			"messages": [
-				{"role": "user", "content": f"Context:{proj_description}\nQueryNode:{query}"}
-			]
-		})
+	def _invoke(self, messages):
+		research_content = self.research_agent.invoke({"messages": messages})
 
 		print(" === Raw Response === ")
 		print(research_content)
@@ -118,19 +166,115 @@ class ResearcherAgent:
 		# Extract the final message content from the agent
 		messages = research_content.get('messages', [])
 		if not messages:
-			return {"error": "No response from agent"}
+			return None
 
 		# Get the last message (should be the assistant's response)
 		final_message = messages[-1]
 
 		# Extract content from the message
 		if hasattr(final_message, 'content'):
-			content = final_message.content
+			return final_message.content
 		elif isinstance(final_message, dict):
-			content = final_message.get('content', '')
+			return final_message.get('content', '')
 		else:
-			content = str(final_message)
+			return str(final_message)
+
+	def call(self, proj_description, query, bypass_cache=False):
+		self.search_calls = 0
+		messages = [
+			{"role": "user", "content": f"Context:{proj_description}\nQueryNode:{query}"}
+		]
+		try:
+			return llm_cache.call(
+				self.llm.model_name,
+				self.llm.reasoning_effort,
+				self.system_prompt,
+				messages,
+				lambda: self._invoke(messages),
+				bypass=bypass_cache,
+				parse=self._checked
+			)
+		except ResearchParseError as e:
+			return e.result
+
+	def call_delta(self, proj_description, query, cached_result, bypass_cache=False):
+		"""Adapts research cached from another project that referenced the same
+		entity, with a single low-effort call instead of a full research run."""
+		messages = [
+			{"role": "user", "content": f"Context:{proj_description}\nQueryNode:{query}\nExistingResearch:{json.dumps(cached_result)}"}
+		]
+		try:
+			delta = llm_cache.call(
+				self.delta_llm.model_name,
+				self.delta_llm.reasoning_effort,
+				DELTA_PROMPT,
+				messages,
+				lambda: self.delta_llm.invoke([{"role": "system", "content": DELTA_PROMPT}] + messages).content,
+				bypass=bypass_cache,
+				parse=self._checked
+			)
+		except ResearchParseError:
+			return cached_result
+		return {**cached_result, "projectNotes": delta}
+
+	def call_batch(self, proj_description, nodes, bypass_cache=False):
+		"""Researches several nodes in one request. nodes is a list of
+		(element_id, query) pairs. Returns {element_id: result} for the nodes
+		whose output validated; the caller retries the rest individually."""
+		batch = [{"elementId": element_id, "node": query} for element_id, query in nodes]
+		messages = [
+			{"role": "user", "content": f"Context:{proj_description}\nQueryNodes:{json.dumps(batch)}"}
+		]
+		requested = {element_id for element_id, _ in nodes}
+		try:
+			return llm_cache.call(
+				self.llm.model_name,
+				self.llm.reasoning_effort,
+				BATCH_SYSTEM_PROMPT,
+				messages,
+				lambda: self.llm.invoke([{"role": "system", "content": BATCH_SYSTEM_PROMPT}] + messages).content,
+				bypass=bypass_cache,
+				parse=lambda content: self._parse_batch(content, requested)
+			)
+		except ResearchParseError as e:
+			return e.result
+
+	def _checked(self, content):
+		if content is None:
+			raise ResearchParseError({"error": "No response from agent"})
+		result = self._parse(content)
+		if "error" in result:
+			raise ResearchParseError(result)
+		return result
+
+	def _parse_batch(self, content, requested):
+		# A batch is cached if at least one requested node validated.
+		start_idx = content.find('[')
+		end_idx = content.rfind(']')
+		try:
+			items = json.loads(content[start_idx:end_idx + 1])
+		except json.JSONDecodeError as e:
+			print(" === Batch JSON Parse Error === ")
+			print(f"Error: {e}")
+			raise ResearchParseError({})
+		if not isinstance(items, list):
+			raise ResearchParseError({})
+
+		results = {}
+		for item in items:
+			try:
+				validated = BatchResearchResult.model_validate(item)
+			except ValidationError as v:
+				print(" === Batch item failed validation === ")
+				print(v)
+				continue
+			if validated.elementId in requested:
+				results[validated.elementId] = validated.model_dump(exclude={"elementId"})
+		if not results:
+			raise ResearchParseError({})
+		return results
 
+	def _parse(self, content):
 		print(" === Extracted Content === ")
 		print(content)
 
@@ -0,0 +1,71 @@
+import os
+import re
+import json
+import hashlib
+
+from dotenv import load_dotenv
+
+from redis_ops import redisClient
+from neo4j_ops import ENTITY_LABEL
+
+load_dotenv()
+
+RESEARCH_CACHE_TTL = int(os.getenv("RESEARCH_CACHE_TTL", str(30 * 24 * 3600)))
+# "reuse" returns the cached research as-is, "delta" asks the model for a
+# short project-specific addendum on top of it.
+RESEARCH_CACHE_MODE = os.getenv("RESEARCH_CACHE_MODE", "reuse")
+
+CACHE_KEY = "research_cache:{}"
+STATS_KEY = "research_cache:stats"
+
+# Properties that identify the real-world entity behind a node, as opposed
+# to project-specific details such as role or location.
+FINGERPRINT_PROPS = ("name", "type", "subtype", "materialType")
+
+def normalize(value) -> str:
+    value = re.sub(r"[^\w\s]", " ", str(value).lower())
+    return " ".join(value.split())
+
+def entity_fingerprint(node):
+    """Returns a stable hash of a node's label and identifying properties,
+    or None when the node has nothing identifying to key on."""
+    labels = sorted(l for l in node.labels if l != ENTITY_LABEL and not l.startswith("id_"))
+    props = {
+        k: normalize(node[k]) for k in FINGERPRINT_PROPS
+        if k in node and normalize(node[k])
+    }
+    if not labels or not props:
+        return None
+    payload = json.dumps([labels, sorted(props.items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResearchCache:
+    def __init__(self, client=redisClient, ttl: int = RESEARCH_CACHE_TTL):
+        self.client = client
+        self.ttl = ttl
+
+    def contains(self, fingerprint: str) -> bool:
+        return fingerprint is not None and bool(self.client.exists(CACHE_KEY.format(fingerprint)))
+
+    def get(self, fingerprint: str):
+        if fingerprint is None:
+            return None
+        value = self.client.get(CACHE_KEY.format(fingerprint))
+        if value is None:
+            self.client.hincrby(STATS_KEY, "misses", 1)
+            return None
+        self.client.hincrby(STATS_KEY, "hits", 1)
+        return json.loads(value)
+
+    def set(self, fingerprint: str, research_result: dict):
+        if fingerprint is None or "error" in research_result:
+            return
+        self.client.set(CACHE_KEY.format(fingerprint), json.dumps(research_result), ex=self.ttl)
+
+    def stats(self) -> dict:
+        return {k: int(v) for k, v in self.client.hgetall(STATS_KEY).items()}
+
+research_cache = ResearchCache()
+
+if __name__ == "__main__":
+    print(research_cache.stats())
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from research_agent import ResearcherAgent
+from mongo import store_research_results, mark_node_researched
+from research_cache import research_cache, entity_fingerprint, RESEARCH_CACHE_MODE
+
+load_dotenv()
+
+RESEARCH_CONCURRENCY = int(os.getenv("RESEARCH_CONCURRENCY", "4"))
+RESEARCH_RPM = int(os.getenv("RESEARCH_RPM", "30"))
+RESEARCH_TPM = int(os.getenv("RESEARCH_TPM", "8000"))
+
+# Batch mode packs several nodes into one request, sized so the prompt plus
+# the expected output of every node stays within RESEARCH_BATCH_TOKENS.
+RESEARCH_BATCH = os.getenv("RESEARCH_BATCH", "").lower() in ("1", "true", "yes")
+RESEARCH_BATCH_TOKENS = int(os.getenv("RESEARCH_BATCH_TOKENS", "6000"))
+RESEARCH_BATCH_MAX = int(os.getenv("RESEARCH_BATCH_MAX", "10"))
+OUTPUT_TOKENS_PER_NODE = 500
+
+# Rough chars-per-token ratio used to estimate prompt size before sending it.
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+class RateLimiter:
+    """Sliding one-minute window over both request count and estimated tokens."""
+    def __init__(self, requests_per_minute: int = RESEARCH_RPM, tokens_per_minute: int = RESEARCH_TPM):
+        if requests_per_minute < 1 or tokens_per_minute < 1:
+            raise ValueError(
+                f"Rate limits must be positive, got {requests_per_minute} requests and "
+                f"{tokens_per_minute} tokens per minute (RESEARCH_RPM / RESEARCH_TPM)"
+            )
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = deque()
+        self.window_tokens = 0
+        self.lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self.window and now - self.window[0][0] >= 60:
+            _, tokens = self.window.popleft()
+            self.window_tokens -= tokens
+
+    def acquire(self, tokens: int = 1):
+        # A single request larger than the budget would otherwise wait forever.
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._evict(now)
+                if (len(self.window) < self.requests_per_minute
+                        and self.window_tokens + tokens <= self.tokens_per_minute):
+                    self.window.append((now, tokens))
+                    self.window_tokens += tokens
+                    return
+                wait = 60 - (now - self.window[0][0])
+            time.sleep(max(wait, 0.05))
+
+class ResearchExecutor:
+    def __init__(
+        self,
+        concurrency: int = RESEARCH_CONCURRENCY,
+        limiter: RateLimiter = None,
+        batch: bool = RESEARCH_BATCH,
+        batch_tokens: int = RESEARCH_BATCH_TOKENS,
+        batch_max: int = RESEARCH_BATCH_MAX
+    ):
+        self.concurrency = concurrency
+        self.limiter = limiter or RateLimiter()
+        self.batch = batch
+        self.batch_tokens = batch_tokens
+        self.batch_max = batch_max
+        # ResearcherAgent keeps a per-call search counter, so each thread gets its own.
+        self.local = threading.local()
+
+    def _agent(self) -> ResearcherAgent:
+        agent = getattr(self.local, "agent", None)
+        if agent is None:
+            agent = ResearcherAgent()
+            self.local.agent = agent
+        return agent
+
+    def _research(self, proj_description: str, obj):
+        query = str(obj)
+        fingerprint = entity_fingerprint(obj)
+        cached = research_cache.get(fingerprint)
+        if cached is not None:
+            if RESEARCH_CACHE_MODE != "delta":
+                return cached
+            self.limiter.acquire(estimate_tokens(proj_description + query + json.dumps(cached)))
+            return self._agent().call_delta(proj_description, query, cached)
+
+        self.limiter.acquire(estimate_tokens(proj_description + query))
+        research_response = self._agent().call(proj_description, query)
+        # Error results are stored for this project only; the next project
+        # referencing the entity researches it again.
+        if "error" not in research_response:
+            research_cache.set(fingerprint, research_response)
+        return research_response
+
+    def _research_batch(self, proj_description: str, batch: list):
+        """Researches a list of (index, node) pairs and returns (index, node,
+        result) triples. Nodes missing or invalid in the batch response are
+        retried on their own; a node whose retry fails is left out, and the
+        rest of the batch is still returned."""
+        if len(batch) == 1:
+            i, obj = batch[0]
+            return [(i, obj, self._research(proj_description, obj))]
+
+        queries = [(obj.element_id, str(obj)) for _, obj in batch]
+        self.limiter.acquire(estimate_tokens(proj_description + "".join(q for _, q in queries)))
+        results = self._agent().call_batch(proj_description, queries)
+
+        done = []
+        for i, obj in batch:
+            research_response = results.get(obj.element_id)
+            if research_response is None:
+                print(f"Retrying {obj.element_id} individually")
+                try:
+                    research_response = self._research(proj_description, obj)
+                except Exception as E:
+                    print(f" === Research failed for {obj.element_id} === ")
+                    print(E)
+                    continue
+            else:
+                research_cache.set(entity_fingerprint(obj), research_response)
+            done.append((i, obj, research_response))
+        return done
+
+    def _batches(self, proj_description: str, pending: list) -> list:
+        if not self.batch:
+            return [[item] for item in pending]
+
+        budget = self.batch_tokens - estimate_tokens(proj_description)
+        batches, current, used = [], [], 0
+        for i, obj in pending:
+            # Cache hits are cheap on their own, don't spend batch room on them.
+            if research_cache.contains(entity_fingerprint(obj)):
+                batches.append([(i, obj)])
+                continue
+            cost = estimate_tokens(str(obj)) + OUTPUT_TOKENS_PER_NODE
+            if current and (used + cost > budget or len(current) >= self.batch_max):
+                batches.append(current)
+                current, used = [], 0
+            current.append((i, obj))
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def run(self, proj_id: str, proj_description: str, nodes: list, skip_ids=(), on_progress=None) -> int:
+        """Researches every node not in skip_ids and stores each result as soon
+        as it finishes. on_progress, if given, is called with (stored, pending)
+        after each stored result. Returns the number of nodes still
+        unresearched."""
+        pending = [(i, obj) for i, obj in enumerate(nodes) if obj.element_id not in skip_ids]
+        stored = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {
+                pool.submit(self._research_batch, proj_description, batch): batch
+                for batch in self._batches(proj_description, pending)
+            }
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as E:
+                    ids = [obj.element_id for _, obj in futures[future]]
+                    print(f" === Research failed for {ids} === ")
+                    print(E)
+                    continue
+                for i, obj, research_response in results:
+                    store_research_results(i, proj_id, obj.element_id, str(research_response))
+                    mark_node_researched(proj_id, obj.element_id)
+                    stored += 1
+                    print(f"Researched {stored}/{len(pending)}: {obj.element_id}")
+                    if on_progress is not None:
+                        on_progress(stored, len(pending))
+        return len(pending) - stored
@@ -5,6 +5,8 @@ from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, HumanMessage
 import json
 
+from llm_cache import llm_cache
+
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -56,16 +58,17 @@ llm = ChatGroq(
 	api_key=GROQ_API_KEY
 )
 
-def get_research_list(proj_id: str, description: str, cypher_queries: str) -> str:
-    research_content = llm.invoke([
-        SystemMessage(SYSTEM_PROMPT),
-        HumanMessage(f"""Business Description: {description}\nProject Id: {proj_id}\nCypher queries: {cypher_queries}""")
-    ])
-
-    response_str = research_content.content
-    response_json = json.loads(response_str)
-
-    return response_json
+def get_research_list(proj_id: str, description: str, cypher_queries: str, bypass_cache: bool = False) -> str:
+    messages = [HumanMessage(f"""Business Description: {description}\nProject Id: {proj_id}\nCypher queries: {cypher_queries}""")]
+    return llm_cache.call(
+        llm.model_name,
+        llm.reasoning_effort,
+        SYSTEM_PROMPT,
+        messages,
+        lambda: llm.invoke([SystemMessage(SYSTEM_PROMPT)] + messages).content,
+        bypass=bypass_cache,
+        parse=json.loads
+    )
 
 BUSINESS_DESCRIPTION = """
 Business Description:
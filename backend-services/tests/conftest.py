@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The worker modules import each other as top-level modules (python main.py
+# is run from backend-services/), so put that directory on the path.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+import pytest
+from pymongo.errors import OperationFailure
+
+@pytest.fixture
+def mongo(monkeypatch):
+    # MongoClient connects lazily, so importing the module needs no server.
+    monkeypatch.setenv("MONGO_CLUSTER_URI", "mongodb://localhost:27017")
+    import mongo
+    return mongo
+
+class StubCollection:
+    def __init__(self, name, error=None):
+        self.name = name
+        self.error = error
+        self.created = []
+
+    def create_indexes(self, indexes):
+        if self.error is not None:
+            raise self.error
+        self.created.extend(index.document["name"] for index in indexes)
+
+def test_ensure_indexes_creates_every_index(mongo, monkeypatch):
+    stubs = [(StubCollection(f"c{i}"), indexes) for i, (_, indexes) in enumerate(mongo.INDEXES)]
+    monkeypatch.setattr(mongo, "INDEXES", [(stub, indexes) for stub, indexes in stubs])
+    mongo.ensure_indexes()
+    for stub, indexes in stubs:
+        assert stub.created == [index.document["name"] for index in indexes]
+
+def test_ensure_indexes_continues_past_a_failing_collection(mongo, monkeypatch):
+    failing = StubCollection("failing", OperationFailure("index exists with different options"))
+    ok = StubCollection("ok")
+    indexes = mongo.INDEXES[0][1]
+    monkeypatch.setattr(mongo, "INDEXES", [(failing, indexes), (ok, indexes)])
+    mongo.ensure_indexes()
+    assert failing.created == []
+    assert ok.created == [index.document["name"] for index in indexes]
+
+def test_lineage_index_is_unique_per_version(mongo):
+    names = {
+        index.document["name"]: index.document
+        for _, indexes in mongo.INDEXES for index in indexes
+    }
+    lineage = names["lineage_node"]
+    assert lineage["unique"] is True
+    assert list(lineage["key"]) == ["projectId", "elementId", "version"]
@@ -0,0 +1,78 @@
+import json
+
+import fakeredis
+import pytest
+
+import redis_ops
+from redis_ops import (
+    TASK_QUEUE, PROCESSING_QUEUE, LEASES, DELAYED_QUEUE, ATTEMPTS, DEAD_LETTER_QUEUE,
+    STATUS_KEY, MAX_ATTEMPTS, RETRY_BACKOFF, VISIBILITY_TIMEOUT
+)
+
+NOW = 1_000_000.0
+
+@pytest.fixture
+def client(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_ops, "redisClient", client)
+    monkeypatch.setattr(redis_ops.time, "time", lambda: NOW)
+    return client
+
+def _reserve(client, project_id):
+    client.lpush(TASK_QUEUE, project_id)
+    assert redis_ops.reserve_task(timeout=1) == project_id
+
+def test_fail_task_backs_off_exponentially(client):
+    for attempt in range(1, MAX_ATTEMPTS):
+        _reserve(client, "p1")
+        assert redis_ops.fail_task("p1", "boom") is True
+        assert client.zscore(DELAYED_QUEUE, "p1") == NOW + RETRY_BACKOFF * 2 ** (attempt - 1)
+        assert client.hget(ATTEMPTS, "p1") == str(attempt)
+        assert client.lrange(PROCESSING_QUEUE, 0, -1) == []
+        assert client.zscore(LEASES, "p1") is None
+        client.zrem(DELAYED_QUEUE, "p1")
+
+def test_fail_task_dead_letters_after_max_attempts(client):
+    client.hset(ATTEMPTS, "p1", MAX_ATTEMPTS - 1)
+    _reserve(client, "p1")
+    assert redis_ops.fail_task("p1", "boom") is False
+    assert client.zcard(DELAYED_QUEUE) == 0
+    assert client.hget(ATTEMPTS, "p1") is None
+    entry = json.loads(client.lindex(DEAD_LETTER_QUEUE, 0))
+    assert entry["projectId"] == "p1"
+    assert entry["attempts"] == MAX_ATTEMPTS
+    assert entry["error"] == "boom"
+
+def test_requeue_stale_reclaims_expired_lease(client):
+    _reserve(client, "p1")
+    client.zadd(LEASES, {"p1": NOW - 1})
+    redis_ops.requeue_stale()
+    assert client.lrange(PROCESSING_QUEUE, 0, -1) == []
+    assert client.zscore(DELAYED_QUEUE, "p1") == NOW + RETRY_BACKOFF
+    assert client.hget(STATUS_KEY.format("p1"), "stage") == "Retrying"
+
+def test_requeue_stale_fails_task_out_of_attempts(client):
+    client.hset(ATTEMPTS, "p1", MAX_ATTEMPTS - 1)
+    _reserve(client, "p1")
+    client.zadd(LEASES, {"p1": NOW - 1})
+    redis_ops.requeue_stale()
+    assert client.llen(DEAD_LETTER_QUEUE) == 1
+    assert client.hget(STATUS_KEY.format("p1"), "stage") == "Failed"
+
+def test_requeue_stale_leases_task_without_lease(client):
+    client.lpush(PROCESSING_QUEUE, "p1")
+    redis_ops.requeue_stale()
+    assert client.zscore(LEASES, "p1") == NOW + VISIBILITY_TIMEOUT
+    assert client.lrange(PROCESSING_QUEUE, 0, -1) == ["p1"]
+
+def test_requeue_stale_keeps_live_lease(client):
+    _reserve(client, "p1")
+    redis_ops.requeue_stale()
+    assert client.lrange(PROCESSING_QUEUE, 0, -1) == ["p1"]
+    assert client.zcard(DELAYED_QUEUE) == 0
+
+def test_requeue_stale_moves_due_retries_to_queue(client):
+    client.zadd(DELAYED_QUEUE, {"due": NOW - 1, "later": NOW + 60})
+    redis_ops.requeue_stale()
+    assert client.lrange(TASK_QUEUE, 0, -1) == ["due"]
+    assert client.zrange(DELAYED_QUEUE, 0, -1) == ["later"]
@@ -1,6 +1,7 @@
 from langchain_groq import ChatGroq
 from langchain.agents import create_agent
 from langchain_core.tools import tool
+from langchain_core.messages import AIMessageChunk, ToolMessage
 
 from typing import List, Dict
 
@@ -134,6 +135,7 @@ Expansion of international distribution channels remains under evaluation.
 """
 
 from api.mongo import insert_human_message, insert_model_message, insert_final_description
+from api import async_mongo
 from api.mongo_models import AIModel
 
 from api.redis_ops import queue_task
@@ -165,6 +167,9 @@ class DescriptionAgentCaller:
         queue_task(proj_id)
         completed = True
 
+    def _agent_input(self, project_id: str, message_history: List[Dict]) -> Dict:
+        return {"messages": [{"role": "system", "content": f"{self.system_prompt}\nProject id: {project_id}"}] + message_history + [{"role": "system", "content": self.system_prompt}]}
+
     def call(self, message: str, project_id: str, message_history: List[Dict] = []):
         project_id = project_id
         completed = False
@@ -176,9 +181,7 @@ class DescriptionAgentCaller:
         )
         print(f" === USER MESSAGE === \n{message}")
         print(f" === MESSAGE HISTORY === \n{message_history}")
-        agent_response = self.agent.invoke(
-            {"messages": [{"role": "system", "content": f"{self.system_prompt}\nProject id: {project_id}"}] + message_history + [{"role": "system", "content": self.system_prompt}]}
-        )
+        agent_response = self.agent.invoke(self._agent_input(project_id, message_history))
         print(f"===== Response ===== \nf{agent_response}")
         insert_model_message(
             index=len(message_history)+1,
@@ -190,6 +193,108 @@ class DescriptionAgentCaller:
             return "completed"
         return agent_response['messages'][-1].content
 
+    async def acall(self, message: str, project_id: str, message_history: List[Dict] = []):
+        # Same as call, but awaits Groq and Mongo instead of blocking a thread.
+        completed = False
+        await async_mongo.insert_human_message(
+            index=len(message_history),
+            project_id=project_id,
+            content=message,
+            receiverAgent=AIModel.DESCRIPTION_AGENT
+        )
+        agent_response = await self.agent.ainvoke(self._agent_input(project_id, message_history))
+        await async_mongo.insert_model_message(
+            index=len(message_history)+1,
+            senderModel=AIModel.DESCRIPTION_AGENT,
+            project_id=project_id,
+            content=agent_response['messages'][-1].content
+        )
+        if completed == True:
+            return "completed"
+        return agent_response['messages'][-1].content
+
+    def stream(self, message: str, project_id: str, message_history: List[Dict] = []):
+        """Yields (event, data) pairs as the agent runs: "token" for each piece
+        of model text as it arrives, "final_description" once the
+        set_final_description tool has run, and a closing "done" carrying the
+        whole reply, which is persisted before it is sent. A failed run ends
+        with "error" instead and stores no reply."""
+        insert_human_message(
+            index=len(message_history),
+            project_id=project_id,
+            content=message,
+            receiverAgent=AIModel.DESCRIPTION_AGENT
+        )
+        reply = _Reply(project_id)
+        try:
+            for token, _ in self.agent.stream(self._agent_input(project_id, message_history), stream_mode="messages"):
+                event = reply.add(token)
+                if event is not None:
+                    yield event
+        except Exception as e:
+            print(f"Description agent stream failed: {e}")
+            yield "error", {"message": "The assistant failed to respond, please try again."}
+            return
+        insert_model_message(
+            index=len(message_history)+1,
+            senderModel=AIModel.DESCRIPTION_AGENT,
+            project_id=project_id,
+            content=reply.text()
+        )
+        yield reply.done()
+
+    async def astream(self, message: str, project_id: str, message_history: List[Dict] = []):
+        """Async version of stream."""
+        await async_mongo.insert_human_message(
+            index=len(message_history),
+            project_id=project_id,
+            content=message,
+            receiverAgent=AIModel.DESCRIPTION_AGENT
+        )
+        reply = _Reply(project_id)
+        try:
+            async for token, _ in self.agent.astream(self._agent_input(project_id, message_history), stream_mode="messages"):
+                event = reply.add(token)
+                if event is not None:
+                    yield event
+        except Exception as e:
+            print(f"Description agent stream failed: {e}")
+            yield "error", {"message": "The assistant failed to respond, please try again."}
+            return
+        await async_mongo.insert_model_message(
+            index=len(message_history)+1,
+            senderModel=AIModel.DESCRIPTION_AGENT,
+            project_id=project_id,
+            content=reply.text()
+        )
+        yield reply.done()
+
+class _Reply:
+    """Collects the text streamed by the agent's "messages" stream mode and
+    maps each streamed message to an event."""
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.parts = []
+        self.completed = False
+
+    def add(self, token):
+        if isinstance(token, ToolMessage):
+            if token.name == "set_final_description":
+                self.completed = True
+                return "final_description", {"projectId": self.project_id}
+            return None
+        if isinstance(token, AIMessageChunk) and isinstance(token.content, str) and token.content:
+            self.parts.append(token.content)
+            return "token", {"text": token.content}
+        return None
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def done(self):
+        return "done", {"status": "completed" if self.completed else "success", "message": self.text()}
+
 
 # if __name__ == "__main__":
 #     while True:
@@ -0,0 +1,85 @@
+from typing import Optional, List
+
+from pymongo import AsyncMongoClient, ASCENDING, DESCENDING
+
+from api.mongo import MONGO_URI, CHAT_PROJECTION, chat_message, human_message_doc, model_message_doc
+from api.mongo_models import AIModel, Source
+
+# Async counterparts of the api.mongo reads and writes used by the ASGI views.
+
+mongo_client = AsyncMongoClient(MONGO_URI)
+
+db = mongo_client.get_database('supply')
+chat_collection = db['Chats']
+project_collection = db['Projects']
+research_collection = db['ResearchResults']
+layout_collection = db['Layouts']
+lineage_collection = db['Lineage']
+
+async def get_projects(user_pk: int) -> List[str]:
+    returned_cursor = project_collection.find({"userPk": user_pk}, {"_id": 0, "name": 1})
+    return [item.get('name') async for item in returned_cursor]
+
+async def get_project_id(user_pk: int, name: str) -> str:
+    item = await project_collection.find_one({"userPk": user_pk, "name": name}, {"_id": 0, "id": 1})
+    return str(item.get('id')) if item else ""
+
+async def insert_human_message(
+    index: int,
+    project_id: str,
+    content: str,
+    receiverAgent: AIModel,
+    attached: List[Source] = []
+) -> None:
+    doc = human_message_doc(index, project_id, content, receiverAgent, attached)
+    if doc is not None:
+        await chat_collection.insert_one(doc)
+
+async def insert_model_message(
+    index: int,
+    senderModel: AIModel,
+    project_id: str,
+    content: str,
+    sources: List[Source] = []
+) -> None:
+    doc = model_message_doc(index, senderModel, project_id, content, sources)
+    if doc is not None:
+        await chat_collection.insert_one(doc)
+
+async def get_all_messages(project_id: str):
+    returned_cursor = chat_collection.find({"projectId": project_id}, CHAT_PROJECTION).sort("index", ASCENDING)
+    return [chat_message(item) async for item in returned_cursor]
+
+async def get_messages_page(project_id: str, limit: int, before: Optional[int] = None):
+    query = {"projectId": project_id}
+    if before is not None:
+        query["index"] = {"$lt": before}
+    returned_cursor = chat_collection.find(query, CHAT_PROJECTION).sort("index", DESCENDING).limit(limit + 1)
+    items = await returned_cursor.to_list()
+    return [chat_message(item) for item in reversed(items[:limit])], len(items) > limit
+
+async def iter_researched_content(project_id):
+    returned_cursor = research_collection.find(
+        {"projectId": project_id},
+        {"_id": 0, "elementId": 1, "researchResult": 1}
+    )
+    async for item in returned_cursor:
+        yield {
+            "id": item['elementId'],
+            "result": item['researchResult']
+        }
+
+async def get_lineage(project_id: str, element_id: str, version: str, direction: str):
+    stored = await lineage_collection.find_one(
+        {"projectId": project_id, "elementId": element_id, "version": version},
+        {direction: 1}
+    )
+    if stored is None:
+        return None
+    return stored[direction]
+
+async def get_layout_for(project_id) -> dict:
+    stored = await layout_collection.find_one({"projectId": project_id}, {"positions": 1})
+    if stored is None:
+        return {}
+    return stored['positions']
@@ -0,0 +1,95 @@
+from neo4j import AsyncGraphDatabase
+
+from api.neo4j_ops import (
+    NEO4J_URI, NEO4J_UNAME, NEO4J_PASSWORD,
+    NODES_QUERY, EDGES_QUERY, EDGES_BETWEEN_QUERY, LIST_NODES_QUERY, LIST_EDGES_QUERY,
+    LABEL_VIEW_QUERY, NODES_BY_ID_QUERY,
+    neighborhood_query, lineage_query, node_page_params, node_page, edge_page, _node, _edge
+)
+
+# Async counterparts of api.neo4j_ops for the ASGI views, sharing its queries.
+
+driver = AsyncGraphDatabase.driver(uri=NEO4J_URI, auth=(NEO4J_UNAME, NEO4J_PASSWORD))
+
+async def _nodes(tx, query: str, **params) -> list:
+    result = await tx.run(query, **params)
+    return [_node(record) async for record in result]
+
+async def _edges(tx, query: str, **params) -> list:
+    result = await tx.run(query, **params)
+    return [_edge(record) async for record in result]
+
+async def _read_graph(tx, project_id: str):
+    nodes = await _nodes(tx, NODES_QUERY, projectId=project_id)
+    edges = await _edges(tx, EDGES_QUERY, projectId=project_id)
+    return {"nodes": nodes, "edges": edges}
+
+async def get_all_nodes(project_id: str):
+    async with driver.session() as session:
+        return await session.execute_read(_read_graph, project_id)
+
+async def stream_graph(project_id: str, encode, positions: dict = None):
+    """Async api.neo4j_ops.stream_graph: yields the chunks of the async
+    encoder encode(nodes, edges), fed straight from the Neo4j result streams.
+    The relationship query starts only after every node has been read."""
+    positions = positions or {}
+    async with driver.session() as session:
+        async def nodes():
+            result = await session.run(NODES_QUERY, projectId=project_id)
+            async for record in result:
+                node = _node(record)
+                if node["id"] in positions:
+                    node["x"], node["y"] = positions[node["id"]]
+                yield node
+
+        async def edges():
+            result = await session.run(EDGES_QUERY, projectId=project_id)
+            async for record in result:
+                yield _edge(record)
+
+        async for chunk in encode(nodes(), edges()):
+            yield chunk
+
+async def _read_subgraph(tx, project_id: str, query: str, limit: int, **params):
+    nodes = await _nodes(tx, query, projectId=project_id, limit=limit, **params)
+    edges = await _edges(tx, EDGES_BETWEEN_QUERY, projectId=project_id, ids=[node["id"] for node in nodes])
+    return {"nodes": nodes, "edges": edges, "truncated": len(nodes) == limit}
+
+async def get_neighborhood(project_id: str, node_id: str, depth: int = 1, limit: int = 200):
+    async with driver.session() as session:
+        return await session.execute_read(
+            _read_subgraph, project_id, neighborhood_query(depth), limit, nodeId=node_id
+        )
+
+async def get_label_view(project_id: str, labels: list, limit: int = 500):
+    async with driver.session() as session:
+        return await session.execute_read(_read_subgraph, project_id, LABEL_VIEW_QUERY, limit, labels=labels)
+
+async def list_nodes(project_id: str, limit: int, after=None, labels=None):
+    async with driver.session() as session:
+        nodes = await _nodes(
+            session, LIST_NODES_QUERY,
+            projectId=project_id, labels=labels, limit=limit, **node_page_params(after)
+        )
+    return node_page(nodes, limit)
+
+async def list_edges(project_id: str, limit: int, after=None, types=None):
+    async with driver.session() as session:
+        edges = await _edges(
+            session, LIST_EDGES_QUERY,
+            projectId=project_id, types=types, afterId=after if isinstance(after, str) else "", limit=limit
+        )
+    return edge_page(edges, limit)
+
+async def get_nodes_by_id(project_id: str, node_ids: list, labels=None, limit: int = 500):
+    async with driver.session() as session:
+        return await _nodes(
+            session, NODES_BY_ID_QUERY, projectId=project_id, ids=node_ids, labels=labels, limit=limit
+        )
+
+async def trace_lineage(project_id: str, node_id: str, direction: str, labels=None, limit: int = 500):
+    async with driver.session() as session:
+        return await _nodes(
+            session, lineage_query(direction),
+            projectId=project_id, nodeId=node_id, labels=labels, limit=limit
+        )
@@ -0,0 +1,88 @@
+import time
+
+import redis.asyncio
+
+from api.redis_ops import (
+    TASK_QUEUE, PROCESSING_QUEUE, DELAYED_QUEUE, DEAD_LETTER_QUEUE, STATUS_KEY, PROGRESS_KEY,
+    GRAPH_VERSION_KEY, GRAPH_CACHE_KEY, GRAPH_CACHE_LRU, GRAPH_CACHE_SIZES, GRAPH_CACHE_STATS,
+    GRAPH_CACHE_MAX_BYTES, _progress_entries
+)
+
+# Async counterparts of api.redis_ops for the ASGI views.
+
+redisClient = redis.asyncio.Redis(
+    host="localhost",
+    port=6379,
+    decode_responses=True
+)
+
+async def get_task_status(project_id: str):
+    return await redisClient.hget(STATUS_KEY.format(project_id), "stage")
+
+async def read_progress(project_id: str, last_id: str = None, block_ms: int = 15000) -> list:
+    # A blocked XREAD only holds a connection, not a thread.
+    key = PROGRESS_KEY.format(project_id)
+    if last_id is None:
+        latest = await redisClient.xrevrange(key, count=1)
+        if latest:
+            return _progress_entries(latest)
+        last_id = "0"
+    result = await redisClient.xread({key: last_id}, count=100, block=block_ms)
+    return _progress_entries(result[0][1]) if result else []
+
+async def get_queue_stats():
+    async with redisClient.pipeline() as pipe:
+        pipe.llen(TASK_QUEUE)
+        pipe.llen(PROCESSING_QUEUE)
+        pipe.zcard(DELAYED_QUEUE)
+        pipe.llen(DEAD_LETTER_QUEUE)
+        queued, in_flight, delayed, dead = await pipe.execute()
+    return {
+        "queued": queued,
+        "inFlight": in_flight,
+        "delayed": delayed,
+        "deadLetter": dead
+    }
+
+async def get_graph_version(project_id: str) -> str:
+    return await redisClient.get(GRAPH_VERSION_KEY.format(project_id)) or "0"
+
+async def get_cached_graph(project_id: str, fmt: str = "json"):
+    entry = f"{project_id}:{fmt}"
+    async with redisClient.pipeline() as pipe:
+        pipe.get(GRAPH_VERSION_KEY.format(project_id))
+        pipe.hmget(GRAPH_CACHE_KEY.format(entry), "version", "payload")
+        version, (cached_version, payload) = await pipe.execute()
+    version = version or "0"
+    if payload is None or cached_version != version:
+        await redisClient.hincrby(GRAPH_CACHE_STATS, "misses", 1)
+        return version, None
+    async with redisClient.pipeline() as pipe:
+        pipe.hincrby(GRAPH_CACHE_STATS, "hits", 1)
+        pipe.zadd(GRAPH_CACHE_LRU, {entry: time.time()})
+        await pipe.execute()
+    return version, payload
+
+async def cache_graph(project_id: str, version: str, payload: str, fmt: str = "json"):
+    entry = f"{project_id}:{fmt}"
+    async with redisClient.pipeline() as pipe:
+        pipe.hset(GRAPH_CACHE_KEY.format(entry), mapping={"version": version, "payload": payload})
+        pipe.zadd(GRAPH_CACHE_LRU, {entry: time.time()})
+        pipe.hset(GRAPH_CACHE_SIZES, entry, len(payload))
+        await pipe.execute()
+    await _evict_graphs()
+
+async def _evict_graphs():
+    sizes = await redisClient.hgetall(GRAPH_CACHE_SIZES)
+    total = sum(int(size) for size in sizes.values())
+    while total > GRAPH_CACHE_MAX_BYTES:
+        evicted = await redisClient.zpopmin(GRAPH_CACHE_LRU)
+        if not evicted:
+            break
+        entry = evicted[0][0]
+        total -= int(sizes.get(entry, 0))
+        async with redisClient.pipeline() as pipe:
+            pipe.delete(GRAPH_CACHE_KEY.format(entry))
+            pipe.hdel(GRAPH_CACHE_SIZES, entry)
+            pipe.hincrby(GRAPH_CACHE_STATS, "evictions", 1)
+            await pipe.execute()
@@ -0,0 +1,362 @@
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from asgiref.sync import sync_to_async
+import json
+
+from api.views import description_agent, _page_size, _csv_param, _last_event_id, TERMINAL_STAGES, PROGRESS_KEEPALIVE_MS
+from api.async_mongo import get_projects, get_all_messages, get_messages_page, iter_researched_content, get_layout_for, get_lineage
+from api.async_redis_ops import get_task_status, read_progress, get_cached_graph, cache_graph, get_graph_version
+from api.async_neo4j_ops import stream_graph, get_neighborhood, list_nodes, list_edges, get_label_view, get_nodes_by_id, trace_lineage
+from api.redis_ops import GRAPH_CACHE_MAX_ENTRY_BYTES
+from api.project_cache import project_ids
+from api.utils import encode_cursor, decode_cursor
+from api.encoding import (
+    wants_compact, stream_response, agraph_json_chunks, acompact_graph_chunks,
+    compact_research_chunks, ajson_array_chunks, atee_up_to, sse_response, COMPACT_MEDIA_TYPE
+)
+
+# Async versions of the chat, status and read views in api.views, served
+# under ASGI (see API_ASYNC_VIEWS in settings). They await the async Mongo,
+# Redis and Neo4j clients, so a slow Groq or database round trip holds no
+# thread. Responses are the same as the sync views'.
+
+async def _project_id(request, user) -> str:
+    project_id = await request.session.aget('projectId')
+    if not project_id:
+        # The resolver's in-process tier is a locked OrderedDict; misses go
+        # through Redis and Mongo on a thread.
+        project = await request.session.aget('project')
+        project_id = await sync_to_async(project_ids.resolve)(user.pk, project)
+        if project_id:
+            await request.session.aset('projectId', project_id)
+    return project_id
+
+@csrf_exempt
+async def indexChat(request):
+    if request.method == 'POST':
+        user = await request.auser()
+        if user.is_authenticated:
+            json_body = json.loads(request.body)
+            active_project = await request.session.aget('project', '')
+            if active_project == '':
+                return JsonResponse({
+                    "status": "failure",
+                    "message": "Set active project first."
+                })
+
+            user_msg = json_body['message']
+            project_id = await _project_id(request, user)
+            msgs = await request.session.aget('messages')
+            if msgs is None:
+                msgs = await get_all_messages(project_id)
+            agent_response = await description_agent.acall(project_id=project_id, message=user_msg, message_history=msgs)
+            await request.session.aset('messages', msgs + [
+                {"role": "user", "content": user_msg},
+                {"role": "assistant", "content": agent_response}
+            ])
+            if agent_response == "completed":
+                return JsonResponse({
+                    "status": "completed",
+                    "message": "Description found successfully"
+                })
+            return JsonResponse({
+                "status": "success",
+                "message": agent_response
+            })
+
+        else:
+            return JsonResponse({
+                "status": "failure",
+                "message": "not logged in"
+            })
+
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Method not allowed on this route."
+        })
+
+@csrf_exempt
+async def indexChatStream(request):
+    if request.method == 'POST':
+        user = await request.auser()
+        if user.is_authenticated:
+            json_body = json.loads(request.body)
+            active_project = await request.session.aget('project', '')
+            if active_project == '':
+                return JsonResponse({
+                    "status": "failure",
+                    "message": "Set active project first."
+                })
+
+            user_msg = json_body['message']
+            project_id = await _project_id(request, user)
+            msgs = await request.session.aget('messages')
+            if msgs is None:
+                msgs = await get_all_messages(project_id)
+            await request.session.apop('messages', None)
+            return sse_response(description_agent.astream(project_id=project_id, message=user_msg, message_history=msgs))
+
+        else:
+            return JsonResponse({
+                "status": "failure",
+                "message": "not logged in"
+            })
+
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Method not allowed on this route."
+        })
+
+@csrf_exempt
+async def getProjects(request):
+    if request.method == 'GET':
+        user = await request.auser()
+        if user.is_authenticated:
+            projects_list = await get_projects(user.pk)
+            return JsonResponse({
+                "status": "success",
+                "name": user.username,
+                "message": projects_list
+            })
+        else:
+            return JsonResponse({
+                "status": "failure",
+                "message": "User not logged in"
+            })
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Method not allowed on this route"
+        })
+
+@csrf_exempt
+async def getAllMessages(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        active_project = await request.session.aget('project')
+        if not active_project:
+            return JsonResponse({
+                "status": "failure",
+                "message": "Please get an active project first."
+            })
+        proj_id = await _project_id(request, user)
+        try:
+            before = int(request.GET['before']) if request.GET.get('before') else None
+        except ValueError:
+            before = None
+        messages, has_more = await get_messages_page(proj_id, _page_size(request), before)
+        return JsonResponse({
+            "status": "success",
+            "message": messages,
+            "before": messages[0]["index"] if has_more else None
+        })
+
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Please log in first."
+        })
+
+@csrf_exempt
+async def getStatus(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        active_project = await request.session.aget('project', None)
+        if active_project is None:
+            return JsonResponse({
+                "status": "failure",
+                "message": "No active project selected."
+            })
+
+        proj_id = await _project_id(request, user)
+        return JsonResponse({
+            "status": "success",
+            "message": await get_task_status(project_id=proj_id)
+        })
+
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Please log in first."
+        })
+
+async def _progress_events(proj_id: str, last_id):
+    while True:
+        events = await read_progress(proj_id, last_id, PROGRESS_KEEPALIVE_MS)
+        if not events:
+            yield "ping", {}
+            continue
+        for last_id, event in events:
+            yield "progress", event, last_id
+            if event["stage"] in TERMINAL_STAGES:
+                return
+
+@csrf_exempt
+async def getProgress(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        if await request.session.aget('project', None) is None:
+            return JsonResponse({
+                "status": "failure",
+                "message": "No active project selected."
+            })
+        proj_id = await _project_id(request, user)
+        return sse_response(_progress_events(proj_id, _last_event_id(request)))
+
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Please log in first."
+        })
+
+@csrf_exempt
+async def nodeResearchInformation(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        proj_id = await _project_id(request, user)
+        fmt = "compact" if wants_compact(request) else "json"
+        content_type = COMPACT_MEDIA_TYPE if fmt == "compact" else "application/json"
+        version, payload = await get_cached_graph(proj_id, fmt)
+        if payload is not None:
+            return stream_response(request, payload, content_type)
+
+        encode = acompact_graph_chunks if fmt == "compact" else agraph_json_chunks
+        chunks = atee_up_to(
+            stream_graph(proj_id, encode, await get_layout_for(proj_id)),
+            GRAPH_CACHE_MAX_ENTRY_BYTES,
+            lambda payload: cache_graph(proj_id, version, payload, fmt)
+        )
+        return stream_response(request, chunks, content_type)
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+async def nodeNeighborhood(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        node_id = request.GET.get('id')
+        if not node_id:
+            return JsonResponse({
+                "status": "failure",
+                "message": "Malformed request"
+            })
+        try:
+            depth = int(request.GET.get('depth', 1))
+        except ValueError:
+            depth = 1
+        proj_id = await _project_id(request, user)
+        return JsonResponse(await get_neighborhood(proj_id, node_id, depth=depth, limit=_page_size(request)))
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+async def listNodes(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        proj_id = await _project_id(request, user)
+        page = await list_nodes(
+            proj_id,
+            limit=_page_size(request),
+            after=decode_cursor(request.GET.get('cursor')),
+            labels=_csv_param(request, 'label')
+        )
+        return JsonResponse({"nodes": page["nodes"], "cursor": encode_cursor(page["next"])})
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+async def listEdges(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        proj_id = await _project_id(request, user)
+        page = await list_edges(
+            proj_id,
+            limit=_page_size(request),
+            after=decode_cursor(request.GET.get('cursor')),
+            types=_csv_param(request, 'type')
+        )
+        return JsonResponse({"edges": page["edges"], "cursor": encode_cursor(page["next"])})
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+async def labelView(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        labels = _csv_param(request, 'label')
+        if labels is None:
+            return JsonResponse({
+                "status": "failure",
+                "message": "Malformed request"
+            })
+        proj_id = await _project_id(request, user)
+        return JsonResponse(await get_label_view(proj_id, labels, limit=_page_size(request)))
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+async def _lineage(request, direction: str):
+    user = await request.auser()
+    if user.is_authenticated:
+        node_id = request.GET.get('id')
+        if not node_id:
+            return JsonResponse({
+                "status": "failure",
+                "message": "Malformed request"
+            })
+        proj_id = await _project_id(request, user)
+        labels = _csv_param(request, 'label')
+        limit = _page_size(request)
+        node_ids = await get_lineage(proj_id, node_id, await get_graph_version(proj_id), direction)
+        if node_ids is None:
+            nodes = await trace_lineage(proj_id, node_id, direction, labels=labels, limit=limit)
+        else:
+            nodes = await get_nodes_by_id(proj_id, node_ids, labels=labels, limit=limit)
+        return JsonResponse({"nodes": nodes, "indexed": node_ids is not None})
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+async def upstreamNodes(request):
+    return await _lineage(request, "upstream")
+
+@csrf_exempt
+async def downstreamNodes(request):
+    return await _lineage(request, "downstream")
+
+@csrf_exempt
+async def getResearch(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        proj_id = await _project_id(request, user)
+        results = iter_researched_content(f"{proj_id}")
+        if wants_compact(request):
+            # The compact encoder is a sync generator; drain the cursor first.
+            results = [item async for item in results]
+            return stream_response(request, compact_research_chunks(results), COMPACT_MEDIA_TYPE)
+        return stream_response(request, ajson_array_chunks("content", results))
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
@@ -0,0 +1,314 @@
+import json
+import zlib
+
+from django.http import StreamingHttpResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPACT_MEDIA_TYPE = "application/vnd.supply.compact+json"
+BLOCK_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+def wants_compact(request) -> bool:
+    return (
+        request.GET.get('format') == 'compact'
+        or COMPACT_MEDIA_TYPE in request.headers.get('Accept', '')
+    )
+
+def _negotiate_encoding(request):
+    accepted = [e.split(';')[0].strip() for e in request.headers.get('Accept-Encoding', '').split(',')]
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+class _Compressor:
+    """Incremental brotli/gzip/identity encoder of str chunks to bytes."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=5)
+        elif encoding == 'gzip':
+            # wbits 31 writes a gzip header and trailer.
+            self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        else:
+            self.compressor = None
+
+    def process(self, chunk: str) -> bytes:
+        if self.encoding == 'br':
+            return self.compressor.process(chunk.encode())
+        if self.encoding == 'gzip':
+            return self.compressor.compress(chunk.encode())
+        return chunk.encode()
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        if self.encoding == 'gzip':
+            return self.compressor.flush()
+        return b''
+
+def _compress(chunks, encoding):
+    compressor = _Compressor(encoding)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    data = compressor.finish()
+    if data:
+        yield data
+
+async def _acompress(chunks, encoding):
+    compressor = _Compressor(encoding)
+    async for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    data = compressor.finish()
+    if data:
+        yield data
+
+def _split(payload: str):
+    for start in range(0, len(payload), CHUNK_SIZE):
+        yield payload[start:start + CHUNK_SIZE]
+
+def _coalesce(chunks):
+    # Encoders yield one small chunk per item; write in CHUNK_SIZE pieces.
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+async def _acoalesce(chunks):
+    buffer = []
+    size = 0
+    async for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+def stream_response(request, chunks, content_type: str = "application/json"):
+    """Streams an iterable of str chunks, compressed with brotli or gzip when
+    the client accepts it. A str payload is sent in CHUNK_SIZE pieces, and an
+    async iterable is streamed asynchronously (for ASGI views)."""
+    encoding = _negotiate_encoding(request)
+    if hasattr(chunks, '__aiter__'):
+        body = _acompress(_acoalesce(chunks), encoding)
+    else:
+        chunks = _split(chunks) if isinstance(chunks, str) else _coalesce(chunks)
+        body = _compress(chunks, encoding)
+    response = StreamingHttpResponse(body, content_type=content_type)
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept, Accept-Encoding'
+    return response
+
+def sse_event(event: str, data, event_id: str = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events):
+    """Streams (event, data) or (event, data, id) tuples, sync or async, as
+    text/event-stream. Events are sent uncompressed and unbuffered so each
+    reaches the client as soon as it is produced."""
+    if hasattr(events, '__aiter__'):
+        async def body():
+            async for event in events:
+                yield sse_event(*event)
+    else:
+        def body():
+            for event in events:
+                yield sse_event(*event)
+    response = StreamingHttpResponse(body(), content_type="text/event-stream")
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _columns(rows: list, skip: tuple) -> dict:
+    keys = []
+    for row in rows:
+        for key in row:
+            if key not in skip and key not in keys:
+                keys.append(key)
+    return {key: [row.get(key) for row in rows] for key in keys}
+
+def _blocks(items, size: int = BLOCK_SIZE):
+    block = []
+    for item in items:
+        block.append(item)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+async def _ablocks(items, size: int = BLOCK_SIZE):
+    block = []
+    async for item in items:
+        block.append(item)
+        if len(block) == size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+def graph_json_chunks(nodes, edges):
+    """The default {"nodes": [...], "edges": [...]} payload, one item at a time."""
+    yield '{"nodes":['
+    for i, node in enumerate(nodes):
+        yield (',' if i else '') + json.dumps(node)
+    yield '],"edges":['
+    for i, edge in enumerate(edges):
+        yield (',' if i else '') + json.dumps(edge)
+    yield ']}'
+
+async def agraph_json_chunks(nodes, edges):
+    """graph_json_chunks over async node and edge iterables."""
+    yield '{"nodes":['
+    first = True
+    async for node in nodes:
+        yield ('' if first else ',') + json.dumps(node)
+        first = False
+    yield '],"edges":['
+    first = True
+    async for edge in edges:
+        yield ('' if first else ',') + json.dumps(edge)
+        first = False
+    yield ']}'
+
+def _node_block(block: list, node_index: dict, label_table: dict) -> dict:
+    for node in block:
+        node_index[node["id"]] = len(node_index)
+    return {
+        "ids": [node["id"] for node in block],
+        "labels": [label_table.setdefault(tuple(node["labels"]), len(label_table)) for node in block],
+        "props": _columns(block, ("id", "labels"))
+    }
+
+def _edge_block(block: list, node_index: dict, type_table: dict) -> dict:
+    return {
+        "ids": [edge["id"] for edge in block],
+        "source": [node_index.get(edge["source"], -1) for edge in block],
+        "target": [node_index.get(edge["target"], -1) for edge in block],
+        "types": [type_table.setdefault(edge["type"], len(type_table)) for edge in block],
+        "props": _columns(block, ("id", "source", "target", "type"))
+    }
+
+def _compact_tables(label_table: dict, type_table: dict) -> str:
+    return ('],"labels":' + json.dumps([list(labels) for labels in label_table])
+            + ',"types":' + json.dumps(list(type_table)) + '}')
+
+def compact_graph_chunks(nodes, edges):
+    """Encodes node and edge dict streams as columnar blocks. Label lists and
+    relationship types are interned into tables sent at the end, and edge
+    endpoints are indexes into the node order instead of elementIds:
+
+    {"format": "compact-v1",
+     "nodeBlocks": [{"ids": [...], "labels": [...], "props": {key: [...]}}],
+     "edgeBlocks": [{"ids": [...], "source": [...], "target": [...],
+                     "types": [...], "props": {key: [...]}}],
+     "labels": [[...]], "types": [...]}
+    """
+    label_table = {}
+    type_table = {}
+    node_index = {}
+
+    yield '{"format":"compact-v1","nodeBlocks":['
+    for i, block in enumerate(_blocks(nodes)):
+        yield (',' if i else '') + json.dumps(_node_block(block, node_index, label_table))
+
+    yield '],"edgeBlocks":['
+    for i, block in enumerate(_blocks(edges)):
+        yield (',' if i else '') + json.dumps(_edge_block(block, node_index, type_table))
+
+    yield _compact_tables(label_table, type_table)
+
+async def acompact_graph_chunks(nodes, edges):
+    """compact_graph_chunks over async node and edge iterables."""
+    label_table = {}
+    type_table = {}
+    node_index = {}
+
+    yield '{"format":"compact-v1","nodeBlocks":['
+    first = True
+    async for block in _ablocks(nodes):
+        yield ('' if first else ',') + json.dumps(_node_block(block, node_index, label_table))
+        first = False
+
+    yield '],"edgeBlocks":['
+    first = True
+    async for block in _ablocks(edges):
+        yield ('' if first else ',') + json.dumps(_edge_block(block, node_index, type_table))
+        first = False
+
+    yield _compact_tables(label_table, type_table)
+
+def compact_research_chunks(results):
+    """Research results as parallel id and result arrays."""
+    ids = []
+    yield '{"format":"compact-v1","results":['
+    for i, item in enumerate(results):
+        ids.append(item["id"])
+        yield (',' if i else '') + json.dumps(item["result"])
+    yield '],"ids":' + json.dumps(ids) + '}'
+
+def json_array_chunks(key: str, items):
+    yield '{' + json.dumps(key) + ':['
+    for i, item in enumerate(items):
+        yield (',' if i else '') + json.dumps(item)
+    yield ']}'
+
+async def ajson_array_chunks(key: str, items):
+    """json_array_chunks over an async iterable."""
+    yield '{' + json.dumps(key) + ':['
+    first = True
+    async for item in items:
+        yield ('' if first else ',') + json.dumps(item)
+        first = False
+    yield ']}'
+
+def tee_up_to(chunks, limit: int, on_complete):
+    """Passes chunks through, and calls on_complete with the joined payload
+    if the stream finished without exceeding limit characters."""
+    kept = []
+    size = 0
+    for chunk in chunks:
+        if kept is not None:
+            size += len(chunk)
+            if size > limit:
+                kept = None
+            else:
+                kept.append(chunk)
+        yield chunk
+    if kept is not None:
+        on_complete(''.join(kept))
+
+async def atee_up_to(chunks, limit: int, on_complete):
+    """tee_up_to over an async iterable; on_complete is awaited."""
+    kept = []
+    size = 0
+    async for chunk in chunks:
+        if kept is not None:
+            size += len(chunk)
+            if size > limit:
+                kept = None
+            else:
+                kept.append(chunk)
+        yield chunk
+    if kept is not None:
+        await on_complete(''.join(kept))
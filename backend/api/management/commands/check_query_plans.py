@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.mongo import ensure_indexes, check_query_plans
+
+class Command(BaseCommand):
+    help = "Fails if any hot Mongo query is planned as a collection scan."
+
+    def handle(self, *args, **options):
+        ensure_indexes()
+        try:
+            checked = check_query_plans()
+        except RuntimeError as E:
+            raise CommandError(str(E))
+        self.stdout.write(f"No collection scans in {len(checked)} hot queries")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from api.mongo import ensure_indexes
+
+class Command(BaseCommand):
+    help = "Creates any missing Mongo index declared in api.mongo.INDEXES. Run on deploy."
+
+    def handle(self, *args, **options):
+        ensure_indexes()
+        self.stdout.write("Mongo indexes ensured")
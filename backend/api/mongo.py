@@ -1,4 +1,5 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure, DuplicateKeyError
 
 import os
 from pydantic import ValidationError
@@ -19,6 +20,46 @@ chat_collection = db['Chats']
 project_collection = db['Projects']
 desc_collection = db['Descriptions']
 research_collection = db['ResearchResults']
+layout_collection = db['Layouts']
+lineage_collection = db['Lineage']
+
+# One index per query shape below. The worker's mongo.py declares the same
+# indexes for the collections it shares with the API.
+INDEXES = [
+    (project_collection, [
+        IndexModel([("id", ASCENDING)], name="project_id", unique=True),
+        IndexModel([("userPk", ASCENDING), ("name", ASCENDING)], name="user_project_name", unique=True),
+    ]),
+    (chat_collection, [
+        IndexModel([("projectId", ASCENDING), ("index", ASCENDING)], name="project_message_index"),
+    ]),
+    (desc_collection, [
+        IndexModel([("projectId", ASCENDING)], name="description_project"),
+    ]),
+    (research_collection, [
+        IndexModel([("projectId", ASCENDING), ("elementId", ASCENDING)], name="research_project_element"),
+    ]),
+    (layout_collection, [
+        IndexModel([("projectId", ASCENDING)], name="layout_project", unique=True),
+    ]),
+    (lineage_collection, [
+        IndexModel([("projectId", ASCENDING), ("elementId", ASCENDING), ("version", ASCENDING)], name="lineage_node", unique=True),
+    ]),
+]
+
+CHAT_PROJECTION = {"_id": 0, "index": 1, "content": 1, "receiverAgent": 1}
+
+# (name, collection, filter, projection, sort) of every hot read, with
+# placeholder values; see check_query_plans.
+HOT_QUERIES = [
+    ("get_projects", project_collection, {"userPk": 0}, {"_id": 0, "name": 1}, None),
+    ("get_project_id", project_collection, {"userPk": 0, "name": ""}, {"_id": 0, "id": 1}, None),
+    ("get_all_messages", chat_collection, {"projectId": ""}, CHAT_PROJECTION, [("index", ASCENDING)]),
+    ("get_messages_page", chat_collection, {"projectId": "", "index": {"$lt": 0}}, CHAT_PROJECTION, [("index", DESCENDING)]),
+    ("get_researched_content", research_collection, {"projectId": ""}, {"_id": 0, "elementId": 1, "researchResult": 1}, None),
+    ("get_lineage", lineage_collection, {"projectId": "", "elementId": "", "version": ""}, {"upstream": 1}, None),
+    ("get_layout_for", layout_collection, {"projectId": ""}, {"positions": 1}, None),
+]
 
 from api.utils import generate_random_id
 
@@ -38,6 +79,9 @@ def create_project(userPk: int, name: str) -> str:
     try:
         project_collection.insert_one(proj.model_dump())
         return projectId
+    except DuplicateKeyError:
+        # user_project_name: the user already has a project with this name.
+        raise
     except Exception as E:
         print(" === Exception while inserting project === ")
         print(E)
@@ -47,7 +91,7 @@ def get_projects(
 ) -> List[str]:
     returned_cursor = project_collection.find({
         "userPk": user_pk
-    })
+    }, {"_id": 0, "name": 1})
     result = []
     for item in returned_cursor:
         result.append(item.get('name'))
@@ -61,20 +105,20 @@ def get_project_id(
     returned_cursor = project_collection.find({
         "userPk": user_pk,
         "name": name
-    })
+    }, {"_id": 0, "id": 1})
     result = ""
     for item in returned_cursor:
         result = str(item.get('id'))
 
     return result
 
-def insert_human_message(
+def human_message_doc(
     index: int,
     project_id: str,
     content: str,
     receiverAgent: AIModel,
     attached: List[Source] = []
-) -> None:
+) -> Optional[dict]:
     try:
         mes = HumanMessage(
             index=index,
@@ -86,21 +130,16 @@ def insert_human_message(
     except ValidationError as v:
         print(" === Error while inserting human message === ")
         print(v)
-        return
-    
-    try:
-        chat_collection.insert_one(mes.model_dump(mode="json"))
-    except Exception as E:
-        print(" === EXCEPTION WHILE INSERTING HUMAN MESSAGE === ")
-        raise E
+        return None
+    return mes.model_dump(mode="json")
 
-def insert_model_message(
+def model_message_doc(
     index: int,
     senderModel: AIModel,
     project_id: str,
     content: str,
     sources: List[Source] = []
-):
+) -> Optional[dict]:
     try:
         mes = AIMessage(
             index=index,
@@ -112,10 +151,39 @@ def insert_model_message(
     except ValidationError as v:
         print(" === Error while validating model message === ")
         print(v)
+        return None
+    return mes.model_dump(mode="json")
+
+def insert_human_message(
+    index: int,
+    project_id: str,
+    content: str,
+    receiverAgent: AIModel,
+    attached: List[Source] = []
+) -> None:
+    doc = human_message_doc(index, project_id, content, receiverAgent, attached)
+    if doc is None:
+        return
+    
+    try:
+        chat_collection.insert_one(doc)
+    except Exception as E:
+        print(" === EXCEPTION WHILE INSERTING HUMAN MESSAGE === ")
+        raise E
+
+def insert_model_message(
+    index: int,
+    senderModel: AIModel,
+    project_id: str,
+    content: str,
+    sources: List[Source] = []
+):
+    doc = model_message_doc(index, senderModel, project_id, content, sources)
+    if doc is None:
         return
     
     try:
-        chat_collection.insert_one(mes.model_dump(mode="json"))
+        chat_collection.insert_one(doc)
     except Exception as E:
         print(" === EXCEPTION WHILE INSERTING HUMAN MESSAGE === ")
         raise E
@@ -126,41 +194,95 @@ def insert_final_description(proj_id: str, description: str):
         "description": description
     })
 
+def chat_message(item: dict) -> dict:
+    # Human messages are the ones addressed to an agent.
+    return {
+        "index": item['index'],
+        "role": "user" if 'receiverAgent' in item else "assistant",
+        "content": item['content']
+    }
+
 def get_all_messages(project_id: str):
     returned_cursor = chat_collection.find({
         "projectId": project_id
-    })
-    chats_list = []
-    for item in returned_cursor:
-        if 'receiverAgent' in item.keys():
-            chats_list.append({
-                "index": item['index'],
-                "role": "user",
-                "content": item['content']
-            })
-        else:
-            chats_list.append({
-                "index": item['index'],
-                "role": "assistant",
-                "content": item['content']
-            })
-
-    sorted_messages = sorted(chats_list, key=lambda x: x.get('index', 2000000))
-    return sorted_messages
+    }, CHAT_PROJECTION).sort("index", ASCENDING)
+    return [chat_message(item) for item in returned_cursor]
 
-def get_researched_content(project_id):
+def get_messages_page(project_id: str, limit: int, before: Optional[int] = None):
+    """Returns (messages, has_more): the last limit messages with an index
+    below before (the latest ones when before is None), oldest first."""
+    query = {"projectId": project_id}
+    if before is not None:
+        query["index"] = {"$lt": before}
+    returned_cursor = chat_collection.find(query, CHAT_PROJECTION).sort("index", DESCENDING).limit(limit + 1)
+    items = list(returned_cursor)
+    return [chat_message(item) for item in reversed(items[:limit])], len(items) > limit
+
+def iter_researched_content(project_id):
     returned_cursor = research_collection.find({
         "projectId": project_id
-    })
-
-    results = []
+    }, {"_id": 0, "elementId": 1, "researchResult": 1})
     for item in returned_cursor:
-        results.append({
+        yield {
             "id": item['elementId'],
             "result": item['researchResult']
-        })
+        }
+
+def get_researched_content(project_id):
+    return list(iter_researched_content(project_id))
+
+def get_lineage(project_id: str, element_id: str, version: str, direction: str):
+    """The node's stored upstream or downstream elementIds, or None when the
+    index was not built for this graph version."""
+    stored = lineage_collection.find_one(
+        {"projectId": project_id, "elementId": element_id, "version": version},
+        {direction: 1}
+    )
+    if stored is None:
+        return None
+    return stored[direction]
+
+def get_layout_for(project_id) -> dict:
+    """Node elementId -> [x, y] as computed by the worker, or {} if the
+    project has not been laid out yet."""
+    stored = layout_collection.find_one({"projectId": project_id}, {"positions": 1})
+    if stored is None:
+        return {}
+    return stored['positions']
+
+def ensure_indexes():
+    """Creates any missing index in INDEXES. Safe to run on every start."""
+    for collection, indexes in INDEXES:
+        try:
+            collection.create_indexes(indexes)
+        except OperationFailure as E:
+            # e.g. existing duplicates blocking a unique index
+            print(f" === Could not create indexes on {collection.name} === ")
+            print(E)
+
+def _plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
 
-    return results
+def check_query_plans() -> list:
+    """Explains every HOT_QUERIES entry and raises if any winning plan is a
+    collection scan. Returns the names of the queries checked."""
+    scans = []
+    for name, collection, query, projection, sort in HOT_QUERIES:
+        cursor = collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if "COLLSCAN" in _plan_stages(cursor.explain()["queryPlanner"]["winningPlan"]):
+            scans.append(name)
+    if scans:
+        raise RuntimeError(f"Collection scans in hot queries: {', '.join(scans)}")
+    return [name for name, *_ in HOT_QUERIES]
 
 if __name__ == "__main__":
     print(insert_human_message(
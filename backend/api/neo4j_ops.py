@@ -21,53 +21,240 @@ for var in required_env_vars:
 
 driver = GraphDatabase.driver(uri=NEO4J_URI, auth=(NEO4J_UNAME, NEO4J_PASSWORD))
 
+NODE_FIELDS = """
+        elementId(n) AS id,
+        [l IN labels(n) WHERE l <> 'Entity'] AS labels,
+        properties(n) AS props
+"""
+
+EDGE_FIELDS = """
+        elementId(r) AS id,
+        elementId(a) AS source,
+        elementId(b) AS target,
+        type(r) AS type,
+        properties(r) AS props
+"""
+
+NODES_QUERY = f"""
+    MATCH (n:Entity {{projectId: $projectId}})
+    RETURN {NODE_FIELDS}
+"""
+
+# Directed so each relationship is returned once, from its start node.
+EDGES_QUERY = f"""
+    MATCH (a:Entity {{projectId: $projectId}})-[r]->(b:Entity {{projectId: $projectId}})
+    RETURN {EDGE_FIELDS}
+"""
+
+MAX_DEPTH = 3
+# Bound on live lineage traversals used while the lineage index is stale.
+LINEAGE_FALLBACK_DEPTH = 10
+
+EDGES_BETWEEN_QUERY = f"""
+    MATCH (a:Entity {{projectId: $projectId}})-[r]->(b:Entity {{projectId: $projectId}})
+    WHERE elementId(a) IN $ids AND elementId(b) IN $ids
+    RETURN {EDGE_FIELDS}
+"""
+
+LIST_NODES_QUERY = f"""
+    MATCH (n:Entity {{projectId: $projectId}})
+    WHERE ($labels IS NULL OR n.label IN $labels)
+      AND (coalesce(n.name, '') > $afterName
+           OR (coalesce(n.name, '') = $afterName AND elementId(n) > $afterId))
+    WITH n ORDER BY coalesce(n.name, ''), elementId(n)
+    LIMIT $limit
+    RETURN {NODE_FIELDS}
+"""
+
+LIST_EDGES_QUERY = f"""
+    MATCH (a:Entity {{projectId: $projectId}})-[r]->(b:Entity {{projectId: $projectId}})
+    WHERE ($types IS NULL OR type(r) IN $types)
+      AND elementId(r) > $afterId
+    WITH a, r, b ORDER BY elementId(r)
+    LIMIT $limit
+    RETURN {EDGE_FIELDS}
+"""
+
+LABEL_VIEW_QUERY = f"""
+    MATCH (n:Entity {{projectId: $projectId}})
+    WHERE n.label IN $labels
+    WITH n LIMIT $limit
+    RETURN {NODE_FIELDS}
+"""
+
+NODES_BY_ID_QUERY = f"""
+    MATCH (n:Entity {{projectId: $projectId}})
+    WHERE elementId(n) IN $ids AND ($labels IS NULL OR n.label IN $labels)
+    WITH n LIMIT $limit
+    RETURN {NODE_FIELDS}
+"""
+
+def neighborhood_query(depth: int) -> str:
+    # Variable-length bounds cannot be parameters; depth is clamped to an int.
+    depth = max(0, min(int(depth), MAX_DEPTH))
+    return f"""
+        MATCH (c:Entity {{projectId: $projectId}})
+        WHERE elementId(c) = $nodeId
+        MATCH (c)-[*0..{depth}]-(n:Entity {{projectId: $projectId}})
+        WITH DISTINCT n
+        LIMIT $limit
+        RETURN {NODE_FIELDS}
+    """
+
+def lineage_query(direction: str) -> str:
+    """direction is "upstream" or "downstream"."""
+    pattern = "(n)-[*1..{0}]->(c)" if direction == "upstream" else "(c)-[*1..{0}]->(n)"
+    return f"""
+        MATCH (c:Entity {{projectId: $projectId}})
+        WHERE elementId(c) = $nodeId
+        MATCH {pattern.format(LINEAGE_FALLBACK_DEPTH)}
+        WHERE n.projectId = $projectId AND n <> c
+          AND ($labels IS NULL OR n.label IN $labels)
+        WITH DISTINCT n
+        LIMIT $limit
+        RETURN {NODE_FIELDS}
+    """
+
+def node_page_params(after) -> dict:
+    after_name, after_id = after if isinstance(after, list) and len(after) == 2 else ("", "")
+    return {"afterName": after_name, "afterId": after_id}
+
+def node_page(nodes: list, limit: int) -> dict:
+    next_cursor = [nodes[-1].get("name", ""), nodes[-1]["id"]] if len(nodes) == limit else None
+    return {"nodes": nodes, "next": next_cursor}
+
+def edge_page(edges: list, limit: int) -> dict:
+    next_cursor = edges[-1]["id"] if len(edges) == limit else None
+    return {"edges": edges, "next": next_cursor}
+
+def _node(record) -> dict:
+    return {"id": record["id"], "labels": record["labels"], **record["props"]}
+
+def _edge(record) -> dict:
+    return {
+        "id": record["id"],
+        "source": record["source"],
+        "target": record["target"],
+        "type": record["type"],
+        **record["props"]
+    }
+
+def _read_graph(tx, project_id: str):
+    nodes = [_node(record) for record in tx.run(NODES_QUERY, projectId=project_id)]
+    edges = [_edge(record) for record in tx.run(EDGES_QUERY, projectId=project_id)]
+    return {"nodes": nodes, "edges": edges}
+
+def stream_graph(project_id: str, encode, positions: dict = None):
+    """Yields the chunks of encode(nodes, edges), where nodes and edges are
+    consumed straight from the Neo4j result streams. The relationship query
+    only starts once every node has been read, so neither result is buffered.
+    Nodes found in positions get its [x, y] as x and y fields."""
+    positions = positions or {}
+    with driver.session() as session:
+        def nodes():
+            for record in session.run(NODES_QUERY, projectId=project_id):
+                node = _node(record)
+                if node["id"] in positions:
+                    node["x"], node["y"] = positions[node["id"]]
+                yield node
+
+        def edges():
+            for record in session.run(EDGES_QUERY, projectId=project_id):
+                yield _edge(record)
+
+        yield from encode(nodes(), edges())
+
+def _edges_between(tx, project_id: str, node_ids: list) -> list:
+    result = tx.run(EDGES_BETWEEN_QUERY, projectId=project_id, ids=node_ids)
+    return [_edge(record) for record in result]
+
+def _read_neighborhood(tx, project_id: str, node_id: str, depth: int, limit: int):
+    result = tx.run(neighborhood_query(depth), projectId=project_id, nodeId=node_id, limit=limit)
+    nodes = [_node(record) for record in result]
+    edges = _edges_between(tx, project_id, [node["id"] for node in nodes])
+    return {"nodes": nodes, "edges": edges, "truncated": len(nodes) == limit}
+
+def get_neighborhood(project_id: str, node_id: str, depth: int = 1, limit: int = 200):
+    """Nodes within depth hops of node_id (at most limit of them) and the
+    relationships among them."""
+    with driver.session() as session:
+        return session.execute_read(_read_neighborhood, project_id, node_id, depth, limit)
+
+def list_nodes(project_id: str, limit: int, after=None, labels=None):
+    """One page of nodes ordered by (name, elementId). after is the
+    [name, elementId] of the last node of the previous page."""
+    with driver.session() as session:
+        result = session.run(
+            LIST_NODES_QUERY,
+            projectId=project_id, labels=labels, limit=limit, **node_page_params(after)
+        )
+        nodes = [_node(record) for record in result]
+    return node_page(nodes, limit)
+
+def list_edges(project_id: str, limit: int, after=None, types=None):
+    """One page of relationships ordered by elementId. after is the
+    elementId of the last relationship of the previous page."""
+    with driver.session() as session:
+        result = session.run(
+            LIST_EDGES_QUERY,
+            projectId=project_id, types=types, afterId=after if isinstance(after, str) else "", limit=limit
+        )
+        edges = [_edge(record) for record in result]
+    return edge_page(edges, limit)
+
+def _read_label_view(tx, project_id: str, labels: list, limit: int):
+    result = tx.run(LABEL_VIEW_QUERY, projectId=project_id, labels=labels, limit=limit)
+    nodes = [_node(record) for record in result]
+    edges = _edges_between(tx, project_id, [node["id"] for node in nodes])
+    return {"nodes": nodes, "edges": edges, "truncated": len(nodes) == limit}
+
+def get_label_view(project_id: str, labels: list, limit: int = 500):
+    """Nodes with any of the given labels and the relationships among them."""
+    with driver.session() as session:
+        return session.execute_read(_read_label_view, project_id, labels, limit)
+
+def _read_topology(tx, project_id: str, keys: list):
+    nodes = tx.run("""
+        MATCH (n:Entity {projectId: $projectId})
+        RETURN elementId(n) AS id,
+               coalesce(n.label, [l IN labels(n) WHERE l <> 'Entity'][0]) AS label,
+               n.name AS name,
+               [key IN $keys | n[key]] AS values
+    """, projectId=project_id, keys=keys).data()
+    for node in nodes:
+        node["props"] = dict(zip(keys, node.pop("values")))
+    edges = tx.run("""
+        MATCH (a:Entity {projectId: $projectId})-[r]->(b:Entity {projectId: $projectId})
+        RETURN elementId(a) AS source, elementId(b) AS target, type(r) AS type
+    """, projectId=project_id).data()
+    return {"nodes": nodes, "edges": edges}
+
+def get_topology(project_id: str, keys=()):
+    """Node ids, labels and names and relationship endpoints and types, for
+    analysis. Of the other properties only those in keys are read, into each
+    node's props."""
+    with driver.session() as session:
+        return session.execute_read(_read_topology, project_id, list(keys))
+
+def get_nodes_by_id(project_id: str, node_ids: list, labels=None, limit: int = 500):
+    """Nodes of the project among node_ids, optionally restricted to labels."""
+    with driver.session() as session:
+        result = session.run(NODES_BY_ID_QUERY, projectId=project_id, ids=node_ids, labels=labels, limit=limit)
+        return [_node(record) for record in result]
+
+def trace_lineage(project_id: str, node_id: str, direction: str, labels=None, limit: int = 500):
+    """Live variable-length traversal, for when no lineage index matches the
+    current graph version. direction is "upstream" or "downstream"."""
+    with driver.session() as session:
+        result = session.run(lineage_query(direction), projectId=project_id, nodeId=node_id, labels=labels, limit=limit)
+        return [_node(record) for record in result]
+
 def get_all_nodes(project_id: str):
+    """Returns every node of the project, including ones without
+    relationships, and every relationship exactly once."""
     with driver.session() as session:
-        result = session.run(f"""
-            MATCH (n:{project_id})-[r]-(m:{project_id})
-            RETURN 
-                elementId(n) AS n_id,
-                labels(n) AS n_labels,
-                properties(n) AS n_props,
-
-                elementId(m) AS m_id,
-                labels(m) AS m_labels,
-                properties(m) AS m_props,
-
-                elementId(r) AS r_id,
-                type(r) AS r_type,
-                properties(r) AS r_props
-        """)
-
-        nodes = {}
-        edges = {}
-
-        for record in result:
-            nodes[record["n_id"]] = {
-                "id": record["n_id"],
-                "labels": record["n_labels"],
-                **record["n_props"]
-            }
-
-            nodes[record["m_id"]] = {
-                "id": record["m_id"],
-                "labels": record["m_labels"],
-                **record["m_props"]
-            }
-
-            edges[record["r_id"]] = {
-                "id": record["r_id"],
-                "source": record["n_id"],
-                "target": record["m_id"],
-                "type": record["r_type"],
-                **record["r_props"]
-            }
-
-        return {
-            "nodes": list(nodes.values()),
-            "edges": list(edges.values())
-        }
+        return session.execute_read(_read_graph, project_id)
 
 
 if __name__ == "__main__":
-    print(get_all_nodes("id_8bhqfqn9yh"))
+    print(get_all_nodes("8bhqfqn9yh"))
@@ -0,0 +1,77 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from api.redis_ops import redisClient
+from api.mongo import get_project_id
+
+# Project name -> projectId resolution, checked in process memory first, then
+# Redis, then Mongo. A (user, name) pair only changes its projectId when the
+# project is created or deleted, so those paths call invalidate().
+
+PROJECT_ID_LOCAL_TTL = int(os.getenv("PROJECT_ID_LOCAL_TTL", "300"))
+PROJECT_ID_LOCAL_SIZE = int(os.getenv("PROJECT_ID_LOCAL_SIZE", "4096"))
+PROJECT_ID_REDIS_TTL = int(os.getenv("PROJECT_ID_REDIS_TTL", str(24 * 3600)))
+
+PROJECT_ID_KEY = "project_id:{}:{}"
+
+class ProjectIdCache:
+    def __init__(
+        self,
+        client=redisClient,
+        local_ttl: int = PROJECT_ID_LOCAL_TTL,
+        local_size: int = PROJECT_ID_LOCAL_SIZE,
+        redis_ttl: int = PROJECT_ID_REDIS_TTL
+    ):
+        self.client = client
+        self.local_ttl = local_ttl
+        self.local_size = local_size
+        self.redis_ttl = redis_ttl
+        # (user_pk, name) -> (projectId, expires at), least recently used first
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _get_local(self, key):
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self.local[key]
+                return None
+            self.local.move_to_end(key)
+            return entry[0]
+
+    def _set_local(self, key, project_id: str):
+        with self.lock:
+            self.local[key] = (project_id, time.monotonic() + self.local_ttl)
+            self.local.move_to_end(key)
+            while len(self.local) > self.local_size:
+                self.local.popitem(last=False)
+
+    def resolve(self, user_pk: int, name: str) -> str:
+        """The projectId of the user's project called name, or "" if there is
+        none. Misses are not cached, so a project created elsewhere is found."""
+        key = (user_pk, name)
+        project_id = self._get_local(key)
+        if project_id is not None:
+            return project_id
+
+        redis_key = PROJECT_ID_KEY.format(user_pk, name)
+        project_id = self.client.get(redis_key)
+        if project_id is None:
+            project_id = get_project_id(user_pk=user_pk, name=name)
+            if not project_id:
+                return ""
+            self.client.set(redis_key, project_id, ex=self.redis_ttl)
+        self._set_local(key, project_id)
+        return project_id
+
+    def invalidate(self, user_pk: int, name: str):
+        # Other processes keep their local copy for at most local_ttl.
+        with self.lock:
+            self.local.pop((user_pk, name), None)
+        self.client.delete(PROJECT_ID_KEY.format(user_pk, name))
+
+project_ids = ProjectIdCache()
@@ -1,3 +1,7 @@
+import os
+import json
+import time
+
 import redis
 
 redisClient = redis.Redis(
@@ -7,10 +11,150 @@ redisClient = redis.Redis(
 )
 
 TASK_QUEUE = "task_queue"
-STATUS_QUEUE = "status"
+PROCESSING_QUEUE = "task_queue:processing"
+DELAYED_QUEUE = "task_queue:delayed"
+DEAD_LETTER_QUEUE = "task_queue:dead"
+STATUS_KEY = "project_status:{}"
+STATUS_ACTIVE = "project_status:active"
+
+PROGRESS_KEY = "progress:{}"
+
+GRAPH_VERSION_KEY = "graph_version:{}"
+GRAPH_CACHE_KEY = "graph_cache:{}"
+GRAPH_CACHE_LRU = "graph_cache:lru"
+GRAPH_CACHE_SIZES = "graph_cache:sizes"
+GRAPH_CACHE_STATS = "graph_cache:stats"
+GRAPH_CACHE_MAX_BYTES = int(os.getenv("GRAPH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Larger payloads are streamed without being cached.
+GRAPH_CACHE_MAX_ENTRY_BYTES = int(os.getenv("GRAPH_CACHE_MAX_ENTRY_BYTES", str(16 * 1024 * 1024)))
 
 def queue_task(project_id: str):
     return redisClient.lpush(TASK_QUEUE, project_id)
 
 def get_task_status(project_id: str):
-    return redisClient.hget("status", project_id)
+    return redisClient.hget(STATUS_KEY.format(project_id), "stage")
+
+def status_summary(project_id: str, record: dict, now: float) -> dict:
+    """A status record with numbers parsed and durations in seconds: of the
+    run, of each stage (the last one still running unless the run finished)
+    and since the worker's last heartbeat."""
+    started = sorted(
+        (float(value), key.split(":", 1)[1]) for key, value in record.items() if key.startswith("started:")
+    )
+    end = float(record.get("finishedAt", now))
+    stages = [
+        {"stage": stage, "startedAt": at, "duration": (started[i + 1][0] if i + 1 < len(started) else end) - at}
+        for i, (at, stage) in enumerate(started)
+    ]
+    summary = {
+        "projectId": project_id,
+        "stage": record.get("stage"),
+        "workerId": record.get("workerId"),
+        "startedAt": float(record.get("startedAt", end)),
+        "duration": end - float(record.get("startedAt", end)),
+        "heartbeatAge": now - float(record["heartbeat"]) if "heartbeat" in record else None,
+        "stages": stages
+    }
+    for key in ("researched", "total", "eta"):
+        if key in record:
+            summary[key] = int(record[key])
+    if "error" in record:
+        summary["error"] = record["error"]
+    return summary
+
+def get_in_flight():
+    """Every project with a run in progress, longest running first."""
+    project_ids = redisClient.zrange(STATUS_ACTIVE, 0, -1)
+    pipe = redisClient.pipeline()
+    for project_id in project_ids:
+        pipe.hgetall(STATUS_KEY.format(project_id))
+    now = time.time()
+    return [
+        status_summary(project_id, record, now)
+        for project_id, record in zip(project_ids, pipe.execute()) if record
+    ]
+
+def _progress_entries(entries) -> list:
+    return [(entry_id, json.loads(fields["event"])) for entry_id, fields in entries]
+
+def read_progress(project_id: str, last_id: str = None, block_ms: int = 15000) -> list:
+    """(entry id, event) pairs from the project's progress stream that come
+    after last_id, waiting up to block_ms for one to arrive. Without last_id
+    only the latest event is returned, if there is one."""
+    key = PROGRESS_KEY.format(project_id)
+    if last_id is None:
+        latest = redisClient.xrevrange(key, count=1)
+        if latest:
+            return _progress_entries(latest)
+        last_id = "0"
+    result = redisClient.xread({key: last_id}, count=100, block=block_ms)
+    return _progress_entries(result[0][1]) if result else []
+
+def get_queue_stats():
+    pipe = redisClient.pipeline()
+    pipe.llen(TASK_QUEUE)
+    pipe.llen(PROCESSING_QUEUE)
+    pipe.zcard(DELAYED_QUEUE)
+    pipe.llen(DEAD_LETTER_QUEUE)
+    queued, in_flight, delayed, dead = pipe.execute()
+    return {
+        "queued": queued,
+        "inFlight": in_flight,
+        "delayed": delayed,
+        "deadLetter": dead
+    }
+
+def get_graph_version(project_id: str) -> str:
+    return redisClient.get(GRAPH_VERSION_KEY.format(project_id)) or "0"
+
+def get_cached_graph(project_id: str, fmt: str = "json"):
+    """Returns (version, payload). payload is None unless the cached copy in
+    this format was serialized at the project's current graph version. fmt is
+    a wire format ("json", "compact") or a derived view such as "analytics"."""
+    entry = f"{project_id}:{fmt}"
+    pipe = redisClient.pipeline()
+    pipe.get(GRAPH_VERSION_KEY.format(project_id))
+    pipe.hmget(GRAPH_CACHE_KEY.format(entry), "version", "payload")
+    version, (cached_version, payload) = pipe.execute()
+    version = version or "0"
+    if payload is None or cached_version != version:
+        redisClient.hincrby(GRAPH_CACHE_STATS, "misses", 1)
+        return version, None
+    pipe = redisClient.pipeline()
+    pipe.hincrby(GRAPH_CACHE_STATS, "hits", 1)
+    pipe.zadd(GRAPH_CACHE_LRU, {entry: time.time()})
+    pipe.execute()
+    return version, payload
+
+def cache_graph(project_id: str, version: str, payload: str, fmt: str = "json"):
+    # One entry per project and format: a new version overwrites the old one.
+    entry = f"{project_id}:{fmt}"
+    pipe = redisClient.pipeline()
+    pipe.hset(GRAPH_CACHE_KEY.format(entry), mapping={"version": version, "payload": payload})
+    pipe.zadd(GRAPH_CACHE_LRU, {entry: time.time()})
+    pipe.hset(GRAPH_CACHE_SIZES, entry, len(payload))
+    pipe.execute()
+    _evict_graphs()
+
+def _evict_graphs():
+    sizes = redisClient.hgetall(GRAPH_CACHE_SIZES)
+    total = sum(int(size) for size in sizes.values())
+    while total > GRAPH_CACHE_MAX_BYTES:
+        evicted = redisClient.zpopmin(GRAPH_CACHE_LRU)
+        if not evicted:
+            break
+        entry = evicted[0][0]
+        total -= int(sizes.get(entry, 0))
+        pipe = redisClient.pipeline()
+        pipe.delete(GRAPH_CACHE_KEY.format(entry))
+        pipe.hdel(GRAPH_CACHE_SIZES, entry)
+        pipe.hincrby(GRAPH_CACHE_STATS, "evictions", 1)
+        pipe.execute()
+
+def get_graph_cache_stats():
+    stats = {k: int(v) for k, v in redisClient.hgetall(GRAPH_CACHE_STATS).items()}
+    lookups = stats.get("hits", 0) + stats.get("misses", 0)
+    stats["hitRate"] = stats.get("hits", 0) / lookups if lookups else 0.0
+    stats["entries"] = redisClient.zcard(GRAPH_CACHE_LRU)
+    stats["bytes"] = sum(int(size) for size in redisClient.hvals(GRAPH_CACHE_SIZES))
+    return stats
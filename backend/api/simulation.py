@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from api.analytics import ProjectGraph
+
+# Monte Carlo disruption simulation. Supply flows along relationship
+# direction (Supplier -> Material -> Factory -> Warehouse -> Market). A node
+# is supplied when it has no incoming flow and has not failed, or when any
+# of its non-failed predecessors is supplied. Scenarios are bit-packed, one
+# bit per trial, so each propagation step is a reduceat over all edges for
+# every trial at once.
+
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", "1"))
+# Trials per process pool task.
+SIMULATION_CHUNK = int(os.getenv("SIMULATION_CHUNK", "1024"))
+MAX_TRIALS = 100000
+# Nodes whose failures are drawn at once.
+SAMPLE_BLOCK = 256
+
+DEFAULT_TARGET_LABELS = ["Product", "Market"]
+# Relationship types that carry goods from their start node to their end
+# node. SPEC_SYSTEM_PROMPT in backend-services/cypher_agent.py asks for the
+# first of these in that direction; the rest are common variants. Ownership
+# and service links such as OPERATES must not count as supply, or they keep
+# nodes supplied no matter which suppliers fail.
+DEFAULT_SUPPLY_RELATIONSHIPS = [
+    "SUPPLIES", "USED_IN", "PRODUCES", "SHIPS_TO", "SOLD_IN",
+    "PROVIDES", "DELIVERS_TO", "DISTRIBUTES_TO", "MANUFACTURES", "SELLS_TO", "SOLD_TO"
+]
+# Relationship types that point against the flow of goods, from the consumer
+# to what it consumes (Factory -[:USES_MATERIAL]-> Material). Supply runs
+# from their end node to their start node. Graphs generated before the prompt
+# fixed edge direction use these.
+DEFAULT_REVERSED_RELATIONSHIPS = [
+    "USES_MATERIAL", "USES", "REQUIRES", "CONSUMES", "SOURCES_FROM", "BUYS_FROM", "PURCHASES_FROM"
+]
+
+class FailureRule(BaseModel):
+    """Selects nodes that fail independently with probability. A node is
+    selected if it is listed in ids, or matches label and every where
+    condition (case-insensitive substring match on the property value)."""
+    probability: float = Field(ge=0, le=1)
+    ids: List[str] = []
+    label: Optional[str] = None
+    where: Dict[str, Union[str, int, float, bool]] = {}
+
+class ScenarioSpec(BaseModel):
+    failures: List[FailureRule] = Field(min_length=1)
+    trials: int = Field(default=5000, ge=1, le=MAX_TRIALS)
+    seed: int = 0
+    # Only these relationship types carry supply, forwards or reversed.
+    relationships: List[str] = Field(default=DEFAULT_SUPPLY_RELATIONSHIPS, min_length=1)
+    reversed: List[str] = DEFAULT_REVERSED_RELATIONSHIPS
+    targets: List[str] = DEFAULT_TARGET_LABELS
+
+    def cache_key(self) -> str:
+        payload = json.dumps(self.model_dump(), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def property_keys(self) -> list:
+        return sorted({key for rule in self.failures for key in rule.where})
+
+def _matches(node: dict, rule: FailureRule) -> bool:
+    if node["id"] in rule.ids:
+        return True
+    if rule.label is None and not rule.where:
+        return False
+    if rule.label is not None and node["label"] != rule.label:
+        return False
+    for key, expected in rule.where.items():
+        value = node["props"].get(key)
+        if value is None or str(expected).lower() not in str(value).lower():
+            return False
+    return True
+
+def failure_probabilities(topology: dict, spec: ScenarioSpec) -> np.ndarray:
+    """Per node probability of failing; rules combine as independent causes."""
+    survive = np.ones(len(topology["nodes"]))
+    for rule in spec.failures:
+        hit = np.array([_matches(node, rule) for node in topology["nodes"]], dtype=bool)
+        survive[hit] *= 1 - rule.probability
+    return 1 - survive
+
+def _flow(graph: ProjectGraph, relationships: list, reversed_relationships: list):
+    """Flow edges sorted by target, with the reduceat segment starts of the
+    nodes that have incoming flow. Edges of reversed_relationships types flow
+    from their end node to their start node."""
+    types = graph.types[graph.type_codes]
+    forward = np.isin(types, relationships)
+    backward = np.isin(types, reversed_relationships) & ~forward
+    src = np.concatenate([graph.src[forward], graph.dst[backward]])
+    dst = np.concatenate([graph.dst[forward], graph.src[backward]])
+    order = np.argsort(dst, kind="stable")
+    src, dst = src[order], dst[order]
+    fed, starts = np.unique(dst, return_index=True)
+    return src, fed, starts
+
+def _propagate(n: int, src: np.ndarray, fed: np.ndarray, starts: np.ndarray, up: np.ndarray) -> np.ndarray:
+    """up is (n, words) packed bits of non-failed trials per node. Returns
+    packed bits of the trials in which each node is supplied."""
+    roots = np.ones(n, dtype=bool)
+    roots[fed] = False
+    supplied = np.where(roots[:, None], up, 0).astype(np.uint8)
+    # Supply paths are at most n long; stops as soon as nothing changes.
+    for _ in range(n):
+        if not len(src):
+            break
+        incoming = np.bitwise_or.reduceat(supplied[src], starts, axis=0)
+        updated = supplied.copy()
+        updated[fed] = incoming & up[fed]
+        if np.array_equal(updated, supplied):
+            break
+        supplied = updated
+    return supplied
+
+def run_trials(n: int, src, fed, starts, fail_prob: np.ndarray, trials: int, seed) -> np.ndarray:
+    """Number of trials, out of trials, in which each node is not supplied."""
+    rng = np.random.default_rng(seed)
+    up = np.full((n, (trials + 7) // 8), 0xFF, dtype=np.uint8)
+    # Only nodes that can fail need random draws.
+    risky = np.flatnonzero(fail_prob > 0)
+    for start in range(0, len(risky), SAMPLE_BLOCK):
+        rows = risky[start:start + SAMPLE_BLOCK]
+        up[rows] = np.packbits(rng.random((len(rows), trials)) >= fail_prob[rows, None], axis=1)
+    supplied = _propagate(n, src, fed, starts, up)
+    return trials - np.unpackbits(supplied, axis=1, count=trials).sum(axis=1)
+
+_pool = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS)
+    return _pool
+
+def simulate(topology: dict, spec: ScenarioSpec) -> dict:
+    graph = ProjectGraph(topology)
+    fail_prob = failure_probabilities(topology, spec)
+    src, fed, starts = _flow(graph, spec.relationships, spec.reversed)
+
+    # Nodes unsupplied even when nothing fails are not part of any chain.
+    baseline = _propagate(graph.n, src, fed, starts, np.packbits(np.ones((graph.n, 1), dtype=bool), axis=1))
+    reachable = np.unpackbits(baseline, axis=1, count=1)[:, 0].astype(bool)
+
+    chunks = [SIMULATION_CHUNK] * (spec.trials // SIMULATION_CHUNK)
+    if spec.trials % SIMULATION_CHUNK:
+        chunks.append(spec.trials % SIMULATION_CHUNK)
+    seeds = np.random.SeedSequence(spec.seed).spawn(len(chunks))
+    args = [(graph.n, src, fed, starts, fail_prob, size, seed) for size, seed in zip(chunks, seeds)]
+    if SIMULATION_WORKERS > 1 and len(chunks) > 1:
+        results = _get_pool().map(run_trials, *zip(*args))
+    else:
+        results = (run_trials(*a) for a in args)
+    cut_off = sum(results) / spec.trials
+
+    targets = set(spec.targets)
+    report = [
+        i for i in range(graph.n)
+        if reachable[i] and (not targets or graph.labels[i] in targets)
+    ]
+    report.sort(key=lambda i: -cut_off[i])
+    return {
+        "trials": spec.trials,
+        "failingNodes": int((fail_prob > 0).sum()),
+        "expectedFailures": round(float(fail_prob.sum()), 3),
+        "nodes": [
+            {**graph.node(i), "cutOffProbability": round(float(cut_off[i]), 4)}
+            for i in report
+        ]
+    }
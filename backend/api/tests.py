@@ -1,3 +1,77 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
+import numpy as np
 
-# Create your tests here.
+from api.analytics import ProjectGraph, articulation_points, betweenness
+from api.simulation import ScenarioSpec, simulate
+
+def _topology(nodes, edges):
+    return {
+        "nodes": [{"id": key, "name": key, "label": label, "props": {}} for key, label in nodes],
+        "edges": [{"source": source, "target": target, "type": rel_type} for source, rel_type, target in edges]
+    }
+
+class AnalyticsTests(SimpleTestCase):
+    DIAMOND = [("a", "Supplier"), ("b", "Material"), ("c", "Material"), ("d", "Factory")]
+
+    def test_betweenness_of_cycle_is_uniform(self):
+        graph = ProjectGraph(_topology(self.DIAMOND, [
+            ("a", "SUPPLIES", "b"), ("a", "SUPPLIES", "c"),
+            ("b", "USED_IN", "d"), ("c", "USED_IN", "d"),
+        ]))
+        np.testing.assert_allclose(betweenness(graph), [1 / 6] * 4)
+
+    def test_reciprocal_and_parallel_edges_count_once(self):
+        graph = ProjectGraph(_topology(self.DIAMOND, [
+            ("a", "SUPPLIES", "b"), ("b", "BUYS_FROM", "a"), ("a", "OWNS", "b"),
+            ("a", "SUPPLIES", "c"),
+            ("b", "USED_IN", "d"), ("c", "USED_IN", "d"),
+        ]))
+        np.testing.assert_allclose(betweenness(graph), [1 / 6] * 4)
+        self.assertEqual(len(graph.und_idx), 8)
+
+    def test_articulation_point_with_reciprocal_edge(self):
+        graph = ProjectGraph(_topology(self.DIAMOND[:3], [
+            ("a", "SUPPLIES", "b"), ("b", "BUYS_FROM", "a"), ("b", "SUPPLIES", "c"),
+        ]))
+        self.assertEqual(articulation_points(graph), [1])
+
+class SimulationTests(SimpleTestCase):
+    NODES = [("supplier", "Supplier"), ("material", "Material"), ("factory", "Factory"), ("product", "Product")]
+
+    def cut_off(self, edges, **spec):
+        spec = ScenarioSpec(failures=[{"probability": 1.0, "ids": ["supplier"]}], trials=64, **spec)
+        result = simulate(_topology(self.NODES, edges), spec)
+        return {node["id"]: node["cutOffProbability"] for node in result["nodes"]}
+
+    def test_failed_supplier_cuts_off_downstream_product(self):
+        cut_off = self.cut_off([
+            ("supplier", "SUPPLIES", "material"),
+            ("material", "USED_IN", "factory"),
+            ("factory", "PRODUCES", "product"),
+        ])
+        self.assertEqual(cut_off, {"product": 1.0})
+
+    def test_flow_opposed_edge_carries_supply_backwards(self):
+        cut_off = self.cut_off([
+            ("supplier", "SUPPLIES", "material"),
+            ("factory", "USES_MATERIAL", "material"),
+            ("factory", "PRODUCES", "product"),
+        ])
+        self.assertEqual(cut_off, {"product": 1.0})
+
+    def test_flow_opposed_edge_ignored_when_not_reversed(self):
+        cut_off = self.cut_off([
+            ("supplier", "SUPPLIES", "material"),
+            ("factory", "USES_MATERIAL", "material"),
+            ("factory", "PRODUCES", "product"),
+        ], reversed=[])
+        self.assertEqual(cut_off, {"product": 0.0})
+
+    def test_service_links_do_not_carry_supply(self):
+        cut_off = self.cut_off([
+            ("supplier", "SUPPLIES", "material"),
+            ("material", "USED_IN", "factory"),
+            ("supplier", "OPERATES", "factory"),
+            ("factory", "PRODUCES", "product"),
+        ])
+        self.assertEqual(cut_off, {"product": 1.0})
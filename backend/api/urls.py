@@ -1,19 +1,39 @@
 from django.urls import path
 
+from django.conf import settings
+
 from .views import *
 
+if settings.API_ASYNC_VIEWS:
+    from .async_views import (
+        indexChat, indexChatStream, getProjects, getAllMessages, getStatus, getProgress, nodeResearchInformation,
+        nodeNeighborhood, listNodes, listEdges, labelView, upstreamNodes, downstreamNodes, getResearch
+    )
+
 urlpatterns = [
     path("signup/", signupRoute, name="SignUp"),
     path("login/", loginRoute, name="LogIn"),
     path("logout/", logoutRoute, name="LogOut"),
     path("is-authenticated/", isUserAuthenticated, name="IsUserAuthenticated"),
     path("first-chat/", indexChat, name="FirstChat"),
+    path("first-chat/stream/", indexChatStream, name="FirstChatStream"),
     path("create-project/", createProject, name="CreateProject"),
     path("get-projects/", getProjects, name="GetProjects"),
     path("select-project/", selectProject, name="SelectProject"),
     path("get-chats/", getAllMessages, name="GetAllMessages"),
     path("status/", getStatus, name="GetStatus"),
+    path("progress/", getProgress, name="GetProgress"),
     path("node-information/", nodeResearchInformation, name="NodeResearchInformation"),
-    path("research/", getResearch, name="GetResearch")
+    path("node-information/neighborhood/", nodeNeighborhood, name="NodeNeighborhood"),
+    path("node-information/nodes/", listNodes, name="ListNodes"),
+    path("node-information/edges/", listEdges, name="ListEdges"),
+    path("node-information/labels/", labelView, name="LabelView"),
+    path("node-information/upstream/", upstreamNodes, name="UpstreamNodes"),
+    path("node-information/downstream/", downstreamNodes, name="DownstreamNodes"),
+    path("analytics/", graphAnalytics, name="GraphAnalytics"),
+    path("simulate/", simulateDisruption, name="SimulateDisruption"),
+    path("research/", getResearch, name="GetResearch"),
+    path("queue-stats/", queueStats, name="QueueStats"),
+    path("in-flight/", inFlightProjects, name="InFlightProjects")
     # path("csrf/", csrf, name="CSRF")
 ]
\ No newline at end of file
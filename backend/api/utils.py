@@ -1,4 +1,6 @@
 import math
+import json
+import base64
 import random
 
 def generate_random_id(l: int):
@@ -6,4 +8,17 @@ def generate_random_id(l: int):
     id = ""
     for _ in range(l):
         id += vocab[math.floor(random.random()*(len(vocab)-1))]
-    return id
\ No newline at end of file
+    return id
+
+def encode_cursor(value) -> str:
+    if value is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+def decode_cursor(cursor: str):
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        return None
\ No newline at end of file
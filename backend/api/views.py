@@ -5,13 +5,23 @@ from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
 
 from pydantic import BaseModel, EmailStr, ValidationError
+from pymongo.errors import DuplicateKeyError
 import json
+import time
 
 from api.agent.description_agent import DescriptionAgentCaller
 
-from api.mongo import create_project, get_projects, get_project_id, get_all_messages, get_researched_content
-from api.redis_ops import get_task_status
-from api.neo4j_ops import get_all_nodes
+from api.mongo import create_project, get_projects, get_all_messages, get_messages_page, iter_researched_content, get_layout_for, get_lineage
+from api.redis_ops import get_task_status, read_progress, get_queue_stats, get_in_flight, get_cached_graph, cache_graph, get_graph_cache_stats, get_graph_version, GRAPH_CACHE_MAX_ENTRY_BYTES
+from api.neo4j_ops import stream_graph, get_neighborhood, list_nodes, list_edges, get_label_view, get_topology, get_nodes_by_id, trace_lineage
+from api.project_cache import project_ids
+from api.analytics import analyze
+from api.simulation import ScenarioSpec, simulate
+from api.utils import encode_cursor, decode_cursor
+from api.encoding import (
+    wants_compact, stream_response, graph_json_chunks, compact_graph_chunks,
+    compact_research_chunks, json_array_chunks, tee_up_to, sse_response, COMPACT_MEDIA_TYPE
+)
 
 class CreateUserRequest(BaseModel):
     name: str
@@ -24,6 +34,16 @@ SAMPLE_PROMPT = """
 The company operates a small-to-medium-scale toy manufacturing business focused on the design and production of educational and play-oriented toys for children. Manufacturing activities are centralized at a single production facility, with an emphasis on safety compliance, cost efficiency, and scalable product lines. Core Activities: Design & Manufacturing: Operates one primary toy manufacturing facility responsible for: Product design finalization Molding, assembly, finishing, and packaging Produces a range of toys including: Plastic toys Wooden toys Simple mechanical and educational playsets Production processes combine automated machinery with manual assembly for quality-sensitive components. Raw Material Sourcing: Primary Materials: Plastic resins (e.g., ABS, polypropylene) sourced from Reliance Petrochemicals. Wood materials (e.g., rubberwood, plywood) sourced from domestic and nearby regional suppliers. Metal components (screws, springs, fasteners) sourced from local hardware manufacturers. Finishing & Safety Materials: Non-toxic paints, dyes, and coatings sourced from certified suppliers to meet child safety standards. Packaging materials such as printed boxes, inserts, and protective wraps sourced from domestic packaging manufacturers. Supplier Network: Majority of suppliers are located domestically to reduce lead times and ensure supply stability. Select specialty components (e.g., electronic modules for interactive toys or specialty finishes) are imported from international suppliers on Ebay. Logistics & Distribution: All inbound and outbound logistics are handled by DTDC. Sales & Distribution Channels: Products are sold through: Online marketplaces Customers: Primary customers include: Independent toy retailers Online consumers
 """
 
+def _project_id(request) -> str:
+    """projectId of the session's active project. Resolved through the
+    project id cache once per session and then kept in the session."""
+    project_id = request.session.get('projectId')
+    if not project_id:
+        project_id = project_ids.resolve(request.user.pk, request.session['project'])
+        if project_id:
+            request.session['projectId'] = project_id
+    return project_id
+
 @csrf_exempt
 def signupRoute(request):
     if request.method == 'POST':
@@ -106,10 +126,21 @@ def createProject(request):
                 name = json_body['name']
                 user_pk = request.user.pk
                 project_id = create_project(user_pk, name)
+                if project_id is None:
+                    return JsonResponse({
+                        "status": "failure",
+                        "message": "Could not create project"
+                    })
+                project_ids.invalidate(user_pk, name)
                 return JsonResponse({
                     "status": "success",
                     "projectId": project_id
                 })
+            except DuplicateKeyError:
+                return JsonResponse({
+                    "status": "failure",
+                    "message": "A project with this name already exists"
+                })
             except KeyError as E:
                 return JsonResponse({
                     "status": "failure",
@@ -166,6 +197,9 @@ def selectProject(request):
                     "message": "no such project"
                 })
             request.session['project'] = body_json['name']
+            request.session['projectId'] = project_ids.resolve(user_pk, body_json['name'])
+            # Chat history belongs to the previously selected project.
+            request.session.pop('messages', None)
             request.session.modified = True
             print(f"Set active project of user with pk: {user_pk} to {request.session['project']}")
             return JsonResponse({
@@ -188,7 +222,6 @@ def indexChat(request):
     if request.method == 'POST':
         if request.user.is_authenticated:
             json_body = json.loads(request.body)
-            msgs = request.session.get('messages', [])
             active_project = request.session.get('project', '')
             if active_project == '':
                 return JsonResponse({
@@ -197,7 +230,12 @@ def indexChat(request):
                 })
             
             user_msg = json_body['message']
-            project_id = get_project_id(request.user.pk, active_project)
+            project_id = _project_id(request)
+            msgs = request.session.get('messages')
+            if msgs is None:
+                # The agent needs the whole conversation; load it once per session.
+                msgs = get_all_messages(project_id)
+                request.session['messages'] = msgs
             agent_response = description_agent.call(project_id=project_id, message=user_msg, message_history=msgs)
             if not msgs:
                 request.session['messages'] = [{"role": "user", "content": user_msg}, {"role": "assistant", "content": agent_response}]
@@ -227,6 +265,43 @@ def indexChat(request):
             "message": "Method not allowed on this route."
         })
 
+@csrf_exempt
+def indexChatStream(request):
+    """first-chat/ as server-sent events: "token" events with the reply as it
+    is generated, "final_description" when the description has been set, and
+    "done" with the status ("success" or "completed") and the whole reply."""
+    if request.method == 'POST':
+        if request.user.is_authenticated:
+            json_body = json.loads(request.body)
+            active_project = request.session.get('project', '')
+            if active_project == '':
+                return JsonResponse({
+                    "status": "failure",
+                    "message": "Set active project first."
+                })
+
+            user_msg = json_body['message']
+            project_id = _project_id(request)
+            msgs = request.session.get('messages')
+            if msgs is None:
+                msgs = get_all_messages(project_id)
+            # The session is saved before the reply is generated, so drop the
+            # cached history; the next turn reloads it from Mongo.
+            request.session.pop('messages', None)
+            return sse_response(description_agent.stream(project_id=project_id, message=user_msg, message_history=msgs))
+
+        else:
+            return JsonResponse({
+                "status": "failure",
+                "message": "not logged in"
+            })
+
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Method not allowed on this route."
+        })
+
 @csrf_exempt
 def getAllMessages(request):
     if request.user.is_authenticated:
@@ -236,13 +311,17 @@ def getAllMessages(request):
                 "status": "failure",
                 "message": "Please get an active project first."
             })
-        proj_id = get_project_id(request.user.pk, active_project)
-        messages = get_all_messages(proj_id)
-        request.session['messages'] = messages
-        request.session.modified = True
+        proj_id = _project_id(request)
+        try:
+            before = int(request.GET['before']) if request.GET.get('before') else None
+        except ValueError:
+            before = None
+        messages, has_more = get_messages_page(proj_id, _page_size(request), before)
         return JsonResponse({
             "status": "success",
-            "message": messages
+            "message": messages,
+            # Pass back as ?before= to fetch the page preceding this one.
+            "before": messages[0]["index"] if has_more else None
         })
 
     else:
@@ -261,7 +340,7 @@ def getStatus(request):
                 "message": "No active project selected."
             })
         
-        proj_id = get_project_id(user_pk=request.user.pk, name=active_project)
+        proj_id = _project_id(request)
         return JsonResponse({
             "status": "success",
             "message": get_task_status(project_id=proj_id)
@@ -273,6 +352,53 @@ def getStatus(request):
             "message": "Please log in first."
         })
 
+# Stages after which the worker publishes nothing more for the project.
+TERMINAL_STAGES = ("Completed", "Failed")
+# Idle streams send a "ping" this often so dead clients are noticed.
+PROGRESS_KEEPALIVE_MS = 15000
+# A sync stream holds a WSGI worker thread, so it ends after about this long
+# and EventSource reconnects with the last event id. The async view has no
+# cap, since an idle stream there holds no thread.
+PROGRESS_SYNC_MAX_SECONDS = 60
+
+def _progress_events(proj_id: str, last_id, max_seconds: float = None):
+    deadline = None if max_seconds is None else time.monotonic() + max_seconds
+    while deadline is None or time.monotonic() < deadline:
+        events = read_progress(proj_id, last_id, PROGRESS_KEEPALIVE_MS)
+        if not events:
+            yield "ping", {}
+            continue
+        for last_id, event in events:
+            yield "progress", event, last_id
+            if event["stage"] in TERMINAL_STAGES:
+                return
+
+def _last_event_id(request):
+    # Sent by EventSource when it reconnects.
+    return request.headers.get('Last-Event-ID') or request.GET.get('after') or None
+
+@csrf_exempt
+def getProgress(request):
+    """The project's progress events as server-sent events, starting from the
+    latest one: stage, and while researching researched, total and eta
+    (seconds). error is set on "Retrying" and "Failed". The stream ends after
+    a "Completed" or "Failed" event, or after PROGRESS_SYNC_MAX_SECONDS, when
+    the client reconnects and resumes from its Last-Event-ID."""
+    if request.user.is_authenticated:
+        if request.session.get('project', None) is None:
+            return JsonResponse({
+                "status": "failure",
+                "message": "No active project selected."
+            })
+        proj_id = _project_id(request)
+        return sse_response(_progress_events(proj_id, _last_event_id(request), PROGRESS_SYNC_MAX_SECONDS))
+
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Please log in first."
+        })
+
 @csrf_exempt
 def logoutRoute(request):
     logout(request)
@@ -284,23 +410,243 @@ def logoutRoute(request):
 @csrf_exempt
 def nodeResearchInformation(request):
     if request.user.is_authenticated:
-        proj_name = request.session['project']
-        proj_id = get_project_id(user_pk=request.user.pk, name=proj_name)
-        return JsonResponse(get_all_nodes(f"id_{proj_id}"))
+        proj_id = _project_id(request)
+        fmt = "compact" if wants_compact(request) else "json"
+        content_type = COMPACT_MEDIA_TYPE if fmt == "compact" else "application/json"
+        version, payload = get_cached_graph(proj_id, fmt)
+        if payload is not None:
+            return stream_response(request, payload, content_type)
+
+        encode = compact_graph_chunks if fmt == "compact" else graph_json_chunks
+        chunks = tee_up_to(
+            stream_graph(proj_id, encode, get_layout_for(proj_id)),
+            GRAPH_CACHE_MAX_ENTRY_BYTES,
+            lambda payload: cache_graph(proj_id, version, payload, fmt)
+        )
+        return stream_response(request, chunks, content_type)
     else:
         return JsonResponse({
             "status": "failure",
             "message": "please log in first."
         })
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def _page_size(request) -> int:
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def _csv_param(request, name: str):
+    value = request.GET.get(name, '')
+    values = [v.strip() for v in value.split(',') if v.strip()]
+    return values or None
+
+@csrf_exempt
+def nodeNeighborhood(request):
+    if request.user.is_authenticated:
+        node_id = request.GET.get('id')
+        if not node_id:
+            return JsonResponse({
+                "status": "failure",
+                "message": "Malformed request"
+            })
+        try:
+            depth = int(request.GET.get('depth', 1))
+        except ValueError:
+            depth = 1
+        proj_id = _project_id(request)
+        return JsonResponse(get_neighborhood(proj_id, node_id, depth=depth, limit=_page_size(request)))
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+def listNodes(request):
+    if request.user.is_authenticated:
+        proj_id = _project_id(request)
+        page = list_nodes(
+            proj_id,
+            limit=_page_size(request),
+            after=decode_cursor(request.GET.get('cursor')),
+            labels=_csv_param(request, 'label')
+        )
+        return JsonResponse({"nodes": page["nodes"], "cursor": encode_cursor(page["next"])})
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+def listEdges(request):
+    if request.user.is_authenticated:
+        proj_id = _project_id(request)
+        page = list_edges(
+            proj_id,
+            limit=_page_size(request),
+            after=decode_cursor(request.GET.get('cursor')),
+            types=_csv_param(request, 'type')
+        )
+        return JsonResponse({"edges": page["edges"], "cursor": encode_cursor(page["next"])})
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+def labelView(request):
+    if request.user.is_authenticated:
+        labels = _csv_param(request, 'label')
+        if labels is None:
+            return JsonResponse({
+                "status": "failure",
+                "message": "Malformed request"
+            })
+        proj_id = _project_id(request)
+        return JsonResponse(get_label_view(proj_id, labels, limit=_page_size(request)))
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+def _lineage(request, direction: str):
+    if request.user.is_authenticated:
+        node_id = request.GET.get('id')
+        if not node_id:
+            return JsonResponse({
+                "status": "failure",
+                "message": "Malformed request"
+            })
+        proj_id = _project_id(request)
+        labels = _csv_param(request, 'label')
+        limit = _page_size(request)
+        node_ids = get_lineage(proj_id, node_id, get_graph_version(proj_id), direction)
+        if node_ids is None:
+            nodes = trace_lineage(proj_id, node_id, direction, labels=labels, limit=limit)
+        else:
+            nodes = get_nodes_by_id(proj_id, node_ids, labels=labels, limit=limit)
+        return JsonResponse({"nodes": nodes, "indexed": node_ids is not None})
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+def upstreamNodes(request):
+    return _lineage(request, "upstream")
+
+@csrf_exempt
+def downstreamNodes(request):
+    return _lineage(request, "downstream")
+
+@csrf_exempt
+def graphAnalytics(request):
+    if request.user.is_authenticated:
+        proj_id = _project_id(request)
+        version, payload = get_cached_graph(proj_id, "analytics")
+        if payload is None:
+            payload = json.dumps({"version": version, **analyze(get_topology(proj_id))})
+            cache_graph(proj_id, version, payload, "analytics")
+        return stream_response(request, payload)
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "please log in first."
+        })
+
+@csrf_exempt
+def simulateDisruption(request):
+    """Body is a ScenarioSpec. failures select nodes that fail independently
+    with a probability; supply then flows along relationships of the types in
+    relationships (DEFAULT_SUPPLY_RELATIONSHIPS when omitted, never empty),
+    from start node to end node, and along relationships of the types in
+    reversed (DEFAULT_REVERSED_RELATIONSHIPS when omitted) from end node to
+    start node. A node without incoming supply is supplied
+    unless it failed; any other node is supplied if a supplied predecessor
+    reaches it. Reports how often each node of the targets labels goes
+    unsupplied over trials runs."""
+    if request.method == 'POST':
+        if request.user.is_authenticated:
+            try:
+                spec = ScenarioSpec.model_validate(json.loads(request.body))
+            except ValidationError as v:
+                return JsonResponse({
+                    "status": "failure",
+                    "message": v.errors(include_context=False)
+                })
+            except ValueError:
+                return JsonResponse({
+                    "status": "failure",
+                    "message": "Malformed request"
+                })
+            proj_id = _project_id(request)
+            # Cached per graph version and scenario.
+            view = f"simulation:{spec.cache_key()}"
+            version, payload = get_cached_graph(proj_id, view)
+            if payload is None:
+                result = simulate(get_topology(proj_id, keys=spec.property_keys()), spec)
+                payload = json.dumps({"version": version, **result})
+                cache_graph(proj_id, version, payload, view)
+            return stream_response(request, payload)
+        else:
+            return JsonResponse({
+                "status": "failure",
+                "message": "please log in first."
+            })
+    else:
+        return JsonResponse({
+            'status': 'failure',
+            'message': 'Method not allowed on this route'
+        })
+
 @csrf_exempt
 def getResearch(request):
     if request.user.is_authenticated:
-        proj_name = request.session['project']
-        proj_id = get_project_id(user_pk=request.user.pk, name=proj_name)
-        return JsonResponse({"content": get_researched_content(f"{proj_id}")})
+        proj_id = _project_id(request)
+        results = iter_researched_content(f"{proj_id}")
+        if wants_compact(request):
+            return stream_response(request, compact_research_chunks(results), COMPACT_MEDIA_TYPE)
+        return stream_response(request, json_array_chunks("content", results))
     else:
         return JsonResponse({
             "status": "failure",
             "message": "please log in first."
-        })
\ No newline at end of file
+        })
+
+@csrf_exempt
+def queueStats(request):
+    if request.user.is_authenticated and request.user.is_staff:
+        return JsonResponse({
+            "status": "success",
+            "message": {
+                **get_queue_stats(),
+                "graphCache": get_graph_cache_stats()
+            }
+        })
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Staff only."
+        })
+
+@csrf_exempt
+def inFlightProjects(request):
+    if request.user.is_authenticated and request.user.is_staff:
+        return JsonResponse({
+            "status": "success",
+            "message": get_in_flight()
+        })
+    else:
+        return JsonResponse({
+            "status": "failure",
+            "message": "Staff only."
+        })
@@ -0,0 +1,172 @@
+import argparse
+import json
+import random
+import statistics
+import time
+
+from api.neo4j_ops import driver, get_all_nodes, _node, _edge
+
+# Compares the undirected single-query graph read that node-information/
+# used to run against the current node + relationship queries, on a
+# synthetic project. Run from backend/: python -m benchmarks.graph_fetch
+#
+# --offline needs no database: it builds the rows each query shape returns
+# for the same synthetic graph and times only turning them into the
+# response, so it leaves out query execution. Row bytes are the JSON size of
+# those rows, a stand-in for what crosses the Bolt connection.
+#
+# --offline --repeat 7, one core (median ms of building the response):
+#   nodes   edges   query     rows   row bytes   response bytes   ms
+#    2000    8000   legacy   16000     6499728          1253744   53.8
+#    2000    8000   current  10000     1392657          1282679    7.3
+#   10000   40000   legacy   80000    32729658          6352373  450.4
+#   10000   40000   current  50000     7046301          6496323   54.8
+# The current response is slightly larger because it includes the tenth of
+# the nodes that have no relationships, which the legacy query dropped.
+
+LEGACY_QUERY = """
+    MATCH (n:Entity {projectId: $projectId})-[r]-(m:Entity {projectId: $projectId})
+    RETURN
+        elementId(n) AS n_id,
+        [l IN labels(n) WHERE l <> 'Entity'] AS n_labels,
+        properties(n) AS n_props,
+
+        elementId(m) AS m_id,
+        [l IN labels(m) WHERE l <> 'Entity'] AS m_labels,
+        properties(m) AS m_props,
+
+        elementId(r) AS r_id,
+        type(r) AS r_type,
+        properties(r) AS r_props
+"""
+
+def legacy_build(records):
+    nodes = {}
+    edges = {}
+    rows = 0
+    for record in records:
+        rows += 1
+        nodes[record["n_id"]] = {"id": record["n_id"], "labels": record["n_labels"], **record["n_props"]}
+        nodes[record["m_id"]] = {"id": record["m_id"], "labels": record["m_labels"], **record["m_props"]}
+        edges[record["r_id"]] = {
+            "id": record["r_id"],
+            "source": record["n_id"],
+            "target": record["m_id"],
+            "type": record["r_type"],
+            **record["r_props"]
+        }
+    return {"nodes": list(nodes.values()), "edges": list(edges.values())}, rows
+
+def legacy_get_all_nodes(project_id: str):
+    with driver.session() as session:
+        return legacy_build(session.run(LEGACY_QUERY, projectId=project_id))
+
+def synthetic_graph(node_count: int, edge_count: int):
+    labels = ["Supplier", "Material", "Factory", "Warehouse", "Market"]
+    nodes = [
+        {"label": labels[i % len(labels)], "name": f"node_{i}", "location": f"Region {i % 40}"}
+        for i in range(node_count)
+    ]
+    # Leave the last tenth of the nodes without relationships. Seeded, so
+    # every run and mode measures the same graph.
+    rng = random.Random(0)
+    connected = max(2, node_count - node_count // 10)
+    edges = [
+        {"from": f"node_{rng.randrange(connected)}", "to": f"node_{rng.randrange(connected)}"}
+        for _ in range(edge_count)
+    ]
+    return nodes, edges
+
+def offline_rows(project_id: str, node_count: int, edge_count: int):
+    """The rows LEGACY_QUERY and the NODES_QUERY + EDGES_QUERY pair return
+    for synthetic_graph, as dicts in place of driver records."""
+    nodes, edges = synthetic_graph(node_count, edge_count)
+    node_ids = {}
+    node_rows = []
+    for i, node in enumerate(nodes):
+        node_ids[node["name"]] = f"4:bench:{i}"
+        node_rows.append({
+            "id": node_ids[node["name"]], "labels": [node["label"]],
+            "props": {"projectId": project_id, **node}
+        })
+    by_id = {row["id"]: row for row in node_rows}
+    edge_rows = [
+        {
+            "id": f"5:bench:{j}", "source": node_ids[edge["from"]], "target": node_ids[edge["to"]],
+            "type": "SUPPLIES", "props": {"projectId": project_id}
+        }
+        for j, edge in enumerate(edges)
+    ]
+    # The undirected pattern matches every relationship from both ends.
+    legacy_rows = []
+    for edge in edge_rows:
+        for n_id, m_id in ((edge["source"], edge["target"]), (edge["target"], edge["source"])):
+            legacy_rows.append({
+                "n_id": n_id, "n_labels": by_id[n_id]["labels"], "n_props": by_id[n_id]["props"],
+                "m_id": m_id, "m_labels": by_id[m_id]["labels"], "m_props": by_id[m_id]["props"],
+                "r_id": edge["id"], "r_type": edge["type"], "r_props": edge["props"]
+            })
+    return legacy_rows, node_rows, edge_rows
+
+def seed(project_id: str, node_count: int, edge_count: int):
+    nodes, edges = synthetic_graph(node_count, edge_count)
+    with driver.session() as session:
+        session.run("""
+            UNWIND $rows AS row
+            CREATE (:Entity {projectId: $projectId, label: row.label, name: row.name, location: row.location})
+        """, rows=nodes, projectId=project_id).consume()
+        session.run("""
+            UNWIND $rows AS row
+            MATCH (a:Entity {projectId: $projectId, name: row.from})
+            MATCH (b:Entity {projectId: $projectId, name: row.to})
+            CREATE (a)-[:SUPPLIES {projectId: $projectId}]->(b)
+        """, rows=edges, projectId=project_id).consume()
+
+def cleanup(project_id: str):
+    with driver.session() as session:
+        session.run("""
+            MATCH (n:Entity {projectId: $projectId})
+            CALL (n) { DETACH DELETE n } IN TRANSACTIONS OF 1000 ROWS
+        """, projectId=project_id).consume()
+
+def measure(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = fn()
+        timings.append(time.perf_counter() - start)
+    return payload, statistics.median(timings) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the project graph read path")
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--edges", type=int, default=8000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--offline", action="store_true", help="time response building from synthetic rows, without Neo4j")
+    args = parser.parse_args()
+
+    project_id = f"bench{random.randrange(10**8)}"
+    row_bytes = {}
+    if args.offline:
+        legacy_rows, node_rows, edge_rows = offline_rows(project_id, args.nodes, args.edges)
+        row_bytes = {"legacy": len(json.dumps(legacy_rows)), "current": len(json.dumps(node_rows + edge_rows))}
+        (legacy, rows), legacy_ms = measure(lambda: legacy_build(legacy_rows), args.repeat)
+        current, current_ms = measure(lambda: {
+            "nodes": [_node(record) for record in node_rows],
+            "edges": [_edge(record) for record in edge_rows]
+        }, args.repeat)
+    else:
+        seed(project_id, args.nodes, args.edges)
+        try:
+            (legacy, rows), legacy_ms = measure(lambda: legacy_get_all_nodes(project_id), args.repeat)
+            current, current_ms = measure(lambda: get_all_nodes(project_id), args.repeat)
+        finally:
+            cleanup(project_id)
+
+    print(f"Synthetic project: {args.nodes} nodes, {args.edges} relationships{' (offline)' if args.offline else ''}")
+    print(f"{'':10}{'rows':>10}{'row bytes':>12}{'nodes':>10}{'edges':>10}{'bytes':>12}{'median ms':>12}")
+    print(f"{'legacy':10}{rows:>10}{row_bytes.get('legacy', '-'):>12}{len(legacy['nodes']):>10}"
+          f"{len(legacy['edges']):>10}{len(json.dumps(legacy)):>12}{legacy_ms:>12.1f}")
+    current_rows = len(current['nodes']) + len(current['edges'])
+    print(f"{'current':10}{current_rows:>10}{row_bytes.get('current', '-'):>12}{len(current['nodes']):>10}"
+          f"{len(current['edges']):>10}{len(json.dumps(current)):>12}{current_ms:>12.1f}")
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+# Load test of the same endpoints served by the sync views under WSGI and the
+# async views under ASGI. Start both servers against the same databases, e.g.
+#   gunicorn backend.wsgi -w 1 --threads 8 -b :8000
+#   uvicorn backend.asgi:application --port 8001
+# log in, select a project, and pass the sessionid cookie. Run from backend/:
+#   python -m benchmarks.wsgi_vs_asgi --session <sessionid>
+
+DEFAULT_PATHS = ["/api/status/", "/api/get-chats/", "/api/node-information/nodes/"]
+
+async def run_level(client: httpx.AsyncClient, paths: list, concurrency: int, total: int):
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < total:
+            path = paths[issued % len(paths)]
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "errors": errors
+    }
+
+async def bench(base_url: str, session: str, paths: list, levels: list, total: int, timeout: float):
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(
+        base_url=base_url, cookies={"sessionid": session}, limits=limits, timeout=timeout
+    ) as client:
+        # Warm up connections, the project id cache and the graph cache.
+        await run_level(client, paths, min(levels), len(paths) * 2)
+        return [(level, await run_level(client, paths, level, total)) for level in levels]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare WSGI and ASGI request throughput")
+    parser.add_argument("--wsgi", default="http://localhost:8000")
+    parser.add_argument("--asgi", default="http://localhost:8001")
+    parser.add_argument("--session", required=True, help="sessionid cookie of a logged-in user with a selected project")
+    parser.add_argument("--path", action="append", dest="paths", help="endpoint to request; repeatable")
+    parser.add_argument("--concurrency", default="1,10,50,200", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    paths = args.paths or DEFAULT_PATHS
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    print(f"{'server':8}{'concurrency':>12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for name, base_url in (("wsgi", args.wsgi), ("asgi", args.asgi)):
+        for level, stats in asyncio.run(bench(base_url, args.session, paths, levels, args.requests, args.timeout)):
+            print(f"{name:8}{level:>12}{stats['throughput']:>10.1f}{stats['p50']:>10.1f}"
+                  f"{stats['p95']:>10.1f}{stats['errors']:>8}")
@@ -7,6 +7,7 @@ import { useNavigate } from "react-router"
 import { toast } from "sonner"
 
 const backendURL = "http://localhost:8000"
+const CHAT_PAGE_SIZE = 50
 
 type Message = {
   role: "assistant" | "user"
@@ -21,6 +22,8 @@ export default function FirstChatPage() {
   const [messages, setMessages] = useState<Array<Message>>([])
   const [userInput, setUserInput] = useState<string>("")
   const [isLoading, setLoading] = useState<boolean>(false)
+  // Index to pass as ?before= for older messages, null once all are loaded
+  const [olderBefore, setOlderBefore] = useState<number | null>(null)
   const navigate = useNavigate()
   const bottomRef = useRef<HTMLDivElement | null>(null)
 
@@ -29,31 +32,40 @@ export default function FirstChatPage() {
     bottomRef.current?.scrollIntoView({ behavior: "smooth" })
   }, [messages])
 
-  useEffect(() => {
-    async function fetchChat() {
-      const chatsResponse = await fetch(`${backendURL}/api/get-chats`, {
-        credentials: "include",
-        headers: { "Content-Type": "application/json" },
-      })
+  async function fetchChatPage(before: number | null): Promise<Array<Message> | null> {
+    const params = new URLSearchParams({ limit: String(CHAT_PAGE_SIZE) })
+    if (before !== null) params.set("before", String(before))
+    const chatsResponse = await fetch(`${backendURL}/api/get-chats/?${params}`, {
+      credentials: "include",
+      headers: { "Content-Type": "application/json" },
+    })
 
-      const chatsJson = await chatsResponse.json()
+    const chatsJson = await chatsResponse.json()
 
-      if (chatsJson.status === "success") {
-        const chatsState = chatsJson.message.map(
-          (m: { role: "user" | "assistant"; content: string }) => ({
-            role: m.role,
-            content: m.content,
-          })
-        )
-        setMessages(chatsState)
-      } else {
-        toast.error("Failed to fetch previous chats.")
-      }
+    if (chatsJson.status !== "success") {
+      toast.error("Failed to fetch previous chats.")
+      return null
     }
+    setOlderBefore(chatsJson.before ?? null)
+    return chatsJson.message.map(
+      (m: { role: "user" | "assistant"; content: string }) => ({
+        role: m.role,
+        content: m.content,
+      })
+    )
+  }
 
-    fetchChat()
+  useEffect(() => {
+    fetchChatPage(null).then(page => {
+      if (page) setMessages(page)
+    })
   }, [])
 
+  async function loadEarlier() {
+    const page = await fetchChatPage(olderBefore)
+    if (page) setMessages(current => [...page, ...current])
+  }
+
   async function askQuestion() {
     if (!userInput.trim()) return
 
@@ -64,30 +76,40 @@ export default function FirstChatPage() {
     setMessages(newMessages)
     setLoading(true)
 
-    const agentResponse = await fetch(`${backendURL}/api/first-chat/`, {
+    const agentResponse = await fetch(`${backendURL}/api/first-chat/stream/`, {
       method: "POST",
       credentials: "include",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ message: userInput }),
     })
 
-    const responseJson = await agentResponse.json()
-
-    if (responseJson.status === "failure" && responseJson.text === "not logged in") {
-      navigate("/login")
-    }
-
-    if (responseJson.status === "success") {
-      setMessages([
-        ...newMessages,
-        { role: "assistant", content: responseJson.message },
-      ])
+    if (agentResponse.headers.get("Content-Type")?.startsWith("application/json")) {
+      const responseJson = await agentResponse.json()
+      if (responseJson.status === "failure" && responseJson.message === "not logged in") {
+        navigate("/login")
+      } else {
+        toast.error(responseJson.message)
+      }
+      setLoading(false)
+      return
     }
 
-    if (responseJson.status === "completed") {
-      toast.success("Information extracted successfully.")
-      navigate("/progress")
-    }
+    // Tokens are appended to an assistant message as they arrive.
+    let reply = ""
+    setMessages([...newMessages, { role: "assistant", content: reply }])
+    await readEvents(agentResponse, (event, data) => {
+      if (event === "token") {
+        reply += data.text
+        setMessages([...newMessages, { role: "assistant", content: reply }])
+      }
+      if (event === "error") {
+        toast.error(data.message)
+      }
+      if (event === "done" && data.status === "completed") {
+        toast.success("Information extracted successfully.")
+        navigate("/progress")
+      }
+    })
 
     setUserInput("")
     setLoading(false)
@@ -106,6 +128,13 @@ export default function FirstChatPage() {
 
         {/* Chat area */}
         <div className="flex-1 overflow-y-auto p-6 space-y-4">
+          {olderBefore !== null && (
+            <div className="flex justify-center">
+              <Button variant="ghost" onClick={loadEarlier}>
+                Load earlier messages
+              </Button>
+            </div>
+          )}
           <ChatsRenderer messages={messages} />
           <div ref={bottomRef} />
         </div>
@@ -133,6 +162,31 @@ export default function FirstChatPage() {
   )
 }
 
+// Parses a text/event-stream body, calling onEvent for each complete event.
+async function readEvents(
+  response: Response,
+  onEvent: (event: string, data: any) => void
+) {
+  const reader = response.body!.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ""
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += value
+    let end
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      let event = "message"
+      let data = ""
+      for (const line of buffer.slice(0, end).split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7)
+        if (line.startsWith("data: ")) data += line.slice(6)
+      }
+      buffer = buffer.slice(end + 2)
+      onEvent(event, JSON.parse(data))
+    }
+  }
+}
+
 function ChatsRenderer({ messages }: ChatsRendererProps) {
   return (
     <>
@@ -8,6 +8,10 @@ interface GraphNode {
   id: string;   // elementId
   name?: string;
   labels?: string[];
+  x?: number;   // precomputed by the worker
+  y?: number;
+  fx?: number;
+  fy?: number;
 }
 
 interface GraphLink {
@@ -54,6 +58,10 @@ export default function GraphPage() {
   const [researchMap, setResearchMap] =
     useState<Record<string, Research>>({});
 
+  // True when every node came with worker-computed coordinates, in which
+  // case they are pinned and the force simulation is skipped.
+  const [precomputed, setPrecomputed] = useState(false);
+
   const [selectedNode, setSelectedNode] =
     useState<GraphNode | null>(null);
   const [selectedResearch, setSelectedResearch] =
@@ -65,8 +73,11 @@ export default function GraphPage() {
       .then(res => res.json())
       .then(data => {
         console.log("Graph data loaded:", data);
+        const nodes: GraphNode[] = data.nodes;
+        const laidOut = nodes.length > 0 && nodes.every(n => n.x !== undefined && n.y !== undefined);
+        setPrecomputed(laidOut);
         setGraph({
-          nodes: data.nodes,
+          nodes: laidOut ? nodes.map(n => ({ ...n, fx: n.x, fy: n.y })) : nodes,
           links: data.edges
         });
       })
@@ -132,7 +143,7 @@ export default function GraphPage() {
   const graphRef = useRef<any>(null);
   useEffect(() => {
     const fg = graphRef.current;
-    if (fg && graph.nodes.length > 0) {
+    if (fg && graph.nodes.length > 0 && !precomputed) {
       // Increase repulsion between nodes
       fg.d3Force("charge", forceManyBody().strength(-1000));
       
@@ -145,7 +156,7 @@ export default function GraphPage() {
       // Reheat the simulation to apply changes and spread out
       fg.d3ReheatSimulation();
     }
-  }, [graph]);
+  }, [graph, precomputed]);
 
   /* ---------- Render ---------- */
   return (
@@ -186,8 +197,8 @@ export default function GraphPage() {
             enableNodeDrag={true}
             enableZoomInteraction={true}
             enablePanInteraction={true}
-            warmupTicks={200}  // Increased for better initial spreading
-            cooldownTicks={300}  // Increased for more stabilization time
+            warmupTicks={precomputed ? 0 : 200}  // Increased for better initial spreading
+            cooldownTicks={precomputed ? 0 : 300}  // Increased for more stabilization time
             onEngineStop={() => console.log("Graph stabilized")}
             />
       </div>
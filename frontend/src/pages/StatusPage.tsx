@@ -1,48 +1,80 @@
 import { useState, useEffect } from 'react';
 import { Loader2 } from 'lucide-react';
 
-export default function StatusPage() {
-  const [status, setStatus] = useState(null);
-  const [error, setError] = useState(null);
-  const [loading, setLoading] = useState(true);
+type Progress = {
+  stage: string;
+  timestamp: number;
+  researched?: number;
+  total?: number;
+  eta?: number;
+  error?: string;
+};
 
-  const getProgressInfo = (taskStatus: string) => {
-    const statusMap = {
-      'None': { percent: 0, label: 'Project still in chat', eta: null },
-      'Queued': { percent: 10, label: 'Started - please wait', eta: '30 mins' },
-      'Creating graph': { percent: 20, label: 'Creating graph', eta: '25 mins' },
-      'Preparing for research': { percent: 30, label: 'Preparing for research', eta: '20 mins' },
-      'Researching': { percent: 40, label: 'Researching', eta: '15 mins' },
-      'Completed': { percent: 100, label: 'Completed', eta: null }
-    };
+const STAGE_PERCENT: Record<string, number> = {
+  'Queued': 5,
+  'Retrying': 5,
+  'Creating graph': 10,
+  'Computing layout': 20,
+  'Indexing lineage': 25,
+  'Preparing for research': 30,
+  'Researching': 30,
+  'Completed': 100
+};
 
-    return statusMap[taskStatus] || { percent: 0, label: taskStatus || 'Unknown status', eta: null };
-  };
+const formatEta = (seconds: number) => {
+  if (seconds < 60) return `${seconds} secs`;
+  if (seconds < 3600) return `${Math.round(seconds / 60)} mins`;
+  return `${Math.floor(seconds / 3600)} h ${Math.round((seconds % 3600) / 60)} mins`;
+};
 
-  const fetchStatus = async () => {
-    try {
-      const response = await fetch('http://localhost:8000/api/status/', {
-        credentials: 'include'
-      });
-      const data = await response.json();
-
-      if (data.status === 'success') {
-        setStatus(data.message);
-        setError(null);
-      } else {
-        setError(data.message);
-      }
-      setLoading(false);
-    } catch (err) {
-      setError('Failed to fetch status. Please check if the server is running.');
-      setLoading(false);
+export default function StatusPage() {
+  const [status, setStatus] = useState<Progress | null>(null);
+  const [error, setError] = useState<string | null>(null);
+  const [loading, setLoading] = useState(true);
+
+  const getProgressInfo = (progress: Progress | null) => {
+    if (progress === null) {
+      return { percent: 0, label: 'Project still in chat', eta: null };
+    }
+    let percent = STAGE_PERCENT[progress.stage] ?? 0;
+    let label = progress.stage;
+    // Research takes most of the run: it fills the bar from 30% to 99%.
+    if (progress.stage === 'Researching' && progress.total) {
+      percent = 30 + Math.floor((69 * (progress.researched ?? 0)) / progress.total);
+      label = `Researching (${progress.researched ?? 0}/${progress.total} nodes)`;
+    }
+    if (progress.stage === 'Retrying') {
+      label = 'Retrying after an error';
     }
+    const eta = progress.eta !== undefined ? formatEta(progress.eta) : null;
+    return { percent, label, eta };
   };
 
   useEffect(() => {
-    fetchStatus();
-    const interval = setInterval(fetchStatus, 3000);
-    return () => clearInterval(interval);
+    // The server pushes each progress event; EventSource reconnects on its
+    // own and resumes after the last event it received.
+    const source = new EventSource('http://localhost:8000/api/progress/', {
+      withCredentials: true
+    });
+
+    source.addEventListener('progress', (e) => {
+      const progress: Progress = JSON.parse((e as MessageEvent).data);
+      setStatus(progress);
+      setError(progress.stage === 'Failed' ? progress.error || 'Project failed.' : null);
+      setLoading(false);
+      if (progress.stage === 'Completed' || progress.stage === 'Failed') {
+        source.close();
+      }
+    });
+    source.addEventListener('ping', () => setLoading(false));
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        setError('Failed to fetch status. Please check if the server is running.');
+        setLoading(false);
+      }
+    };
+
+    return () => source.close();
   }, []);
 
   const progressInfo = getProgressInfo(status);
@@ -128,7 +160,7 @@ export default function StatusPage() {
             )}
 
             <div className="text-center text-xs text-gray-400 mt-4">
-              Auto-refreshing every 3 seconds
+              Live updates
             </div>
           </div>
         )}